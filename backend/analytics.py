@@ -0,0 +1,263 @@
+import argparse
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from .database import (
+    DomainBridgeEntity,
+    DomainLinkDaily,
+    DomainLinkSummary,
+    SessionLocal,
+    UserGraph,
+)
+
+UPSERT_CHUNK_SIZE = 500
+
+# =========================
+# INCREMENTAL UPDATES
+# =========================
+
+def _dialect_insert(db):
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
+
+
+def _later(db, column, value):
+    # The later of a stored value and an incoming one, so a graph that
+    # commits out of order cannot move last_seen backwards
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        return func.max(column, value)
+    if dialect == "postgresql":
+        return func.greatest(column, value)
+    return case((column < value, value), else_=column)
+
+
+def _earlier(db, column, value):
+    # Likewise keeps first_seen from moving forwards
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        return func.min(column, value)
+    if dialect == "postgresql":
+        return func.least(column, value)
+    return case((column > value, value), else_=column)
+
+
+def _upsert(db, model, rows, keys, counters, latest=(), earliest=()):
+    if not rows:
+        return
+
+    insert = _dialect_insert(db)
+
+    if insert is None:
+        # Portable fallback: update in place, insert when nothing matched
+        for row in rows:
+            query = db.query(model).filter_by(**{k: row[k] for k in keys})
+            updates = {c: getattr(model, c) + row[c] for c in counters}
+            updates.update({c: _later(db, getattr(model, c), row[c]) for c in latest})
+            updates.update({c: _earlier(db, getattr(model, c), row[c]) for c in earliest})
+            if not query.update(updates, synchronize_session=False):
+                db.add(model(**row))
+        return
+
+    # INSERT ... ON CONFLICT DO UPDATE keeps concurrent workers from
+    # losing increments and sends each chunk as one statement
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert(model).values(rows[start:start + UPSERT_CHUNK_SIZE])
+
+        set_ = {c: getattr(model, c) + stmt.excluded[c] for c in counters}
+        set_.update({c: _later(db, getattr(model, c), stmt.excluded[c]) for c in latest})
+        set_.update({c: _earlier(db, getattr(model, c), stmt.excluded[c]) for c in earliest})
+
+        db.execute(stmt.on_conflict_do_update(index_elements=keys, set_=set_))
+
+
+def record_graph_links(db, graphs):
+    pair_links = Counter()
+    pair_graphs = Counter()
+    first_seen = {}
+    last_seen = {}
+    daily = Counter()
+    bridges = Counter()
+
+    for graph in graphs:
+        links = json.loads(graph.cross_links_json or "[]")
+        if not links:
+            continue
+
+        created_at = graph.created_at or str(datetime.utcnow())
+        day = created_at[:10]
+        seen_pairs = set()
+
+        for link in links:
+            pair = (graph.username, link["subject_domain"], link["object_domain"])
+
+            pair_links[pair] += 1
+            daily[(pair[0], day) + pair[1:]] += 1
+            seen_pairs.add(pair)
+
+            for entity in {link["subject"], link["object"]}:
+                bridges[pair + (entity,)] += 1
+
+        for pair in seen_pairs:
+            pair_graphs[pair] += 1
+            first_seen[pair] = min(first_seen.get(pair, created_at), created_at)
+            last_seen[pair] = max(last_seen.get(pair, created_at), created_at)
+
+    _upsert(
+        db, DomainLinkSummary,
+        [
+            {
+                "username": username,
+                "subject_domain": subject_domain,
+                "object_domain": object_domain,
+                "link_count": count,
+                "graph_count": pair_graphs[(username, subject_domain, object_domain)],
+                "first_seen": first_seen[(username, subject_domain, object_domain)],
+                "last_seen": last_seen[(username, subject_domain, object_domain)],
+            }
+            for (username, subject_domain, object_domain), count in pair_links.items()
+        ],
+        keys=["username", "subject_domain", "object_domain"],
+        counters=["link_count", "graph_count"],
+        latest=["last_seen"],
+        earliest=["first_seen"]
+    )
+
+    _upsert(
+        db, DomainLinkDaily,
+        [
+            {
+                "username": username,
+                "day": day,
+                "subject_domain": subject_domain,
+                "object_domain": object_domain,
+                "link_count": count,
+            }
+            for (username, day, subject_domain, object_domain), count in daily.items()
+        ],
+        keys=["username", "day", "subject_domain", "object_domain"],
+        counters=["link_count"]
+    )
+
+    _upsert(
+        db, DomainBridgeEntity,
+        [
+            {
+                "username": username,
+                "subject_domain": subject_domain,
+                "object_domain": object_domain,
+                "entity": entity,
+                "link_count": count,
+            }
+            for (username, subject_domain, object_domain, entity), count in bridges.items()
+        ],
+        keys=["username", "subject_domain", "object_domain", "entity"],
+        counters=["link_count"]
+    )
+
+# =========================
+# QUERIES
+# =========================
+
+def cross_domain_summary(db, username, days=30, top=10):
+    matrix = db.query(DomainLinkSummary).filter(
+        DomainLinkSummary.username == username
+    ).order_by(DomainLinkSummary.link_count.desc()).all()
+
+    bridges = db.query(DomainBridgeEntity).filter(
+        DomainBridgeEntity.username == username
+    ).order_by(DomainBridgeEntity.link_count.desc()).limit(top).all()
+
+    since = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+    trend = db.query(DomainLinkDaily).filter(
+        DomainLinkDaily.username == username,
+        DomainLinkDaily.day >= since
+    ).order_by(DomainLinkDaily.day).all()
+
+    domains = sorted(
+        {m.subject_domain for m in matrix} | {m.object_domain for m in matrix}
+    )
+
+    return {
+        "domains": domains,
+        "matrix": [
+            {
+                "subject_domain": m.subject_domain,
+                "object_domain": m.object_domain,
+                "links": m.link_count,
+                "graphs": m.graph_count,
+                "first_seen": m.first_seen,
+                "last_seen": m.last_seen
+            }
+            for m in matrix
+        ],
+        "top_bridges": [
+            {
+                "entity": b.entity,
+                "subject_domain": b.subject_domain,
+                "object_domain": b.object_domain,
+                "links": b.link_count
+            }
+            for b in bridges
+        ],
+        "trend": [
+            {
+                "day": t.day,
+                "subject_domain": t.subject_domain,
+                "object_domain": t.object_domain,
+                "links": t.link_count
+            }
+            for t in trend
+        ]
+    }
+
+# =========================
+# BACKFILL
+# =========================
+
+def rebuild_link_summary(db, username=None, chunk_size=500):
+    # Recompute the summary tables from saved graphs, e.g. for databases
+    # created before the tables existed
+    for model in (DomainLinkSummary, DomainLinkDaily, DomainBridgeEntity):
+        query = db.query(model)
+        if username is not None:
+            query = query.filter(model.username == username)
+        query.delete(synchronize_session=False)
+
+    graphs = db.query(UserGraph).order_by(UserGraph.id)
+    if username is not None:
+        graphs = graphs.filter(UserGraph.username == username)
+
+    chunk = []
+    for graph in graphs.yield_per(chunk_size):
+        chunk.append(graph)
+        if len(chunk) >= chunk_size:
+            record_graph_links(db, chunk)
+            chunk = []
+
+    record_graph_links(db, chunk)
+    db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild cross-domain link summaries from saved graphs"
+    )
+    parser.add_argument("--user", help="Only rebuild this user's summaries")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        rebuild_link_summary(db, args.user)
+    print("Cross-domain link summaries rebuilt")
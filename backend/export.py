@@ -0,0 +1,352 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from .database import SessionLocal, UserGraph
+
+# =========================
+# CONFIG
+# =========================
+
+EXPORT_FORMATS = ("graphml", "csv", "parquet", "arrow")
+EXPORT_TABLES = ("edges", "nodes")
+
+MEDIA_TYPES = {
+    "graphml": "application/graphml+xml",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "zip": "application/zip",
+}
+
+# Rows buffered before a chunk is handed on; memory stays flat regardless
+# of how many graphs are exported
+EXPORT_CHUNK_ROWS = int(os.environ.get("KNOWMAP_EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_QUERY_BATCH = int(os.environ.get("KNOWMAP_EXPORT_QUERY_BATCH", "100"))
+
+
+class ExportError(ValueError):
+    pass
+
+
+def require_pyarrow(fmt):
+    # pyarrow is optional and only needed for the Arrow/Parquet formats
+    if fmt not in ("parquet", "arrow"):
+        return
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ExportError(f"{fmt} export requires pyarrow to be installed")
+
+
+def validate(fmt, table="edges"):
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format, expected one of {', '.join(EXPORT_FORMATS)}")
+    if table not in EXPORT_TABLES:
+        raise ExportError(f"Unknown table, expected one of {', '.join(EXPORT_TABLES)}")
+    require_pyarrow(fmt)
+
+# =========================
+# ROWS
+# =========================
+
+def iter_graphs(db, username, graph_id=None):
+    query = db.query(UserGraph).filter(UserGraph.username == username)
+    if graph_id is not None:
+        query = query.filter(UserGraph.id == graph_id)
+    return query.order_by(UserGraph.id).yield_per(EXPORT_QUERY_BATCH)
+
+
+def graph_rows(graphs):
+    for g in graphs:
+        yield {
+            "graph_id": g.id,
+            "source": g.source,
+            "topic": g.topic,
+            "created_at": g.created_at,
+        }
+
+
+def node_rows(graphs):
+    for g in graphs:
+        graph = json.loads(g.graph_json)
+        layout = json.loads(g.layout_json) if g.layout_json else {}
+
+        for node in graph["nodes"]:
+            x, y = layout.get(node["id"], (None, None))
+            yield {
+                "graph_id": g.id,
+                "id": node["id"],
+                "sources": node.get("sources", []),
+                "x": x,
+                "y": y,
+            }
+
+
+def edge_rows(graphs):
+    for g in graphs:
+        graph = json.loads(g.graph_json)
+
+        for edge in graph["edges"]:
+            yield {
+                "graph_id": g.id,
+                "source": edge["source"],
+                "target": edge["target"],
+                "label": edge["label"],
+                "sources": edge.get("sources", []),
+            }
+
+
+ROWS = {"graphs": graph_rows, "nodes": node_rows, "edges": edge_rows}
+
+COLUMNS = {
+    "graphs": ["graph_id", "source", "topic", "created_at"],
+    "nodes": ["graph_id", "id", "sources", "x", "y"],
+    "edges": ["graph_id", "source", "target", "label", "sources"],
+}
+
+# =========================
+# WRITERS
+# =========================
+
+# Every writer is a generator of bytes chunks, so output can go straight
+# to an HTTP response, a file or a zip entry.
+
+class _ChunkSink(io.RawIOBase):
+    # Collects what a file-based writer (pyarrow, zipfile) writes so it can
+    # be yielded; tell() is supported but seeking is not
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def write_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow([
+            ";".join(value) if isinstance(value, list) else value
+            for value in (row[c] for c in columns)
+        ])
+
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _arrow_schema(table):
+    import pyarrow as pa
+
+    fields = {
+        "graph_id": pa.int64(),
+        "source": pa.string(),
+        "topic": pa.string(),
+        "created_at": pa.string(),
+        "id": pa.string(),
+        "target": pa.string(),
+        "label": pa.string(),
+        "sources": pa.list_(pa.string()),
+        "x": pa.float64(),
+        "y": pa.float64(),
+    }
+    return pa.schema([(c, fields[c]) for c in COLUMNS[table]])
+
+
+def write_arrow(rows, table, fmt="parquet"):
+    # Each chunk of rows becomes one record batch (a row group in Parquet)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(table)
+    sink = _ChunkSink()
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+            chunk = []
+            yield sink.drain()
+
+    if chunk:
+        writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+
+    writer.close()
+    yield sink.drain()
+
+
+def write_graphml(graph):
+    data = json.loads(graph.graph_json)
+    layout = json.loads(graph.layout_json) if graph.layout_json else {}
+
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        '  <key id="sources" for="all" attr.name="sources" attr.type="string"/>\n'
+        '  <key id="x" for="node" attr.name="x" attr.type="double"/>\n'
+        '  <key id="y" for="node" attr.name="y" attr.type="double"/>\n'
+        '  <key id="label" for="edge" attr.name="label" attr.type="string"/>\n'
+        f'  <graph id="graph_{graph.id}" edgedefault="undirected">\n'
+    ).encode("utf-8")
+
+    lines = []
+
+    def flush():
+        chunk = "".join(lines).encode("utf-8")
+        lines.clear()
+        return chunk
+
+    for node in data["nodes"]:
+        lines.append(f'    <node id={quoteattr(node["id"])}>')
+        if node.get("sources"):
+            lines.append(f'<data key="sources">{escape(";".join(node["sources"]))}</data>')
+        if node["id"] in layout:
+            x, y = layout[node["id"]]
+            lines.append(f'<data key="x">{x}</data><data key="y">{y}</data>')
+        lines.append("</node>\n")
+
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield flush()
+
+    for edge in data["edges"]:
+        lines.append(
+            f'    <edge source={quoteattr(edge["source"])} '
+            f'target={quoteattr(edge["target"])}>'
+            f'<data key="label">{escape(edge["label"])}</data>'
+        )
+        if edge.get("sources"):
+            lines.append(f'<data key="sources">{escape(";".join(edge["sources"]))}</data>')
+        lines.append("</edge>\n")
+
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield flush()
+
+    lines.append("  </graph>\n</graphml>\n")
+    yield flush()
+
+
+def write_table(rows, table, fmt):
+    if fmt == "csv":
+        return write_csv(rows, COLUMNS[table])
+    return write_arrow(rows, table, fmt)
+
+# =========================
+# EXPORTS
+# =========================
+
+# These open their own session: a streamed response outlives the request's
+# dependencies, and each pass re-queries instead of holding graphs in memory.
+# Call validate() first, since generators only raise once iterated.
+
+def export_graph(username, graph_id, fmt, table="edges"):
+    with SessionLocal() as db:
+        if fmt == "graphml":
+            for graph in iter_graphs(db, username, graph_id):
+                yield from write_graphml(graph)
+            return
+
+        rows = ROWS[table](iter_graphs(db, username, graph_id))
+        yield from write_table(rows, table, fmt)
+
+
+def export_archive(username, fmt):
+    # One zip with graphs.csv plus either a GraphML file per graph or
+    # node and edge tables covering every graph
+    sink = _ChunkSink()
+    extension = "arrows" if fmt == "arrow" else fmt
+
+    with SessionLocal() as db, zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+
+        def add(name, chunks):
+            with archive.open(name, "w", force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    yield sink.drain()
+
+        yield from add("graphs.csv", write_csv(
+            graph_rows(iter_graphs(db, username)), COLUMNS["graphs"]
+        ))
+
+        if fmt == "graphml":
+            for graph in iter_graphs(db, username):
+                yield from add(f"graphs/graph_{graph.id}.graphml", write_graphml(graph))
+        else:
+            for table in EXPORT_TABLES:
+                rows = ROWS[table](iter_graphs(db, username))
+                yield from add(f"{table}.{extension}", write_table(rows, table, fmt))
+
+    yield sink.drain()
+
+
+def filename(fmt, graph_id=None, table="edges"):
+    if graph_id is None:
+        return f"knowmap_{fmt}.zip"
+    if fmt == "graphml":
+        return f"graph_{graph_id}.graphml"
+    extension = "arrows" if fmt == "arrow" else fmt
+    return f"graph_{graph_id}_{table}.{extension}"
+
+# =========================
+# CLI
+# =========================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a user's stored graphs")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--graph", type=int, help="Export one graph instead of an archive")
+    parser.add_argument("--format", default="csv", choices=EXPORT_FORMATS)
+    parser.add_argument("--table", default="edges", choices=EXPORT_TABLES)
+    parser.add_argument("--output", help="Defaults to a name derived from the export")
+    args = parser.parse_args()
+
+    try:
+        validate(args.format, args.table)
+    except ExportError as e:
+        print(e)
+        sys.exit(1)
+
+    if args.graph is None:
+        chunks = export_archive(args.user, args.format)
+    else:
+        chunks = export_graph(args.user, args.graph, args.format, args.table)
+
+    output = args.output or filename(args.format, args.graph, args.table)
+
+    with open(output, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+    print(f"Export written to {output}")
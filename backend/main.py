@@ -1,28 +1,63 @@
 from fastapi import FastAPI, HTTPException, Depends, Header, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy import create_engine, Column, Integer, String, Text
-from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
-import requests
-import urllib.parse
+import os
+import threading
+import time
 import xml.etree.ElementTree as ET
+import requests
+
+from .database import User, UserGraph, get_db, save_graphs
+from .analytics import cross_domain_summary
+from .export import (
+    MEDIA_TYPES as EXPORT_MEDIA_TYPES,
+    ExportError,
+    export_archive,
+    export_graph,
+    filename as export_filename,
+    validate as validate_export,
+)
+from .sources import (
+    FANOUT_ARXIV_MAX_RESULTS,
+    deduplicate,
+    fan_out,
+    fetch_documents,
+)
 
 # =========================
 # NLP IMPORTS
 # =========================
-from .nlp.preprocessing import preprocess_text
-from .nlp.ner import extract_entities
-from .nlp.relation_extraction import extract_relations
-from .nlp.triples import build_triples
-from .nlp.graph_builder import build_graph, graph_to_json
-from .nlp.cross_domain import detect_cross_domain
+from .nlp.preprocessing import nlp, preprocess_text
+from .nlp.pipeline import analyze_corpus, analyze_doc
+from .nlp.layout import compute_layout, layout_is_current
+from .vector_index import (
+    RELATED_GRAPHS_K,
+    encode,
+    graph_terms,
+    index_graphs,
+    related_graphs,
+    terms,
+)
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    metrics_middleware,
+    record_cache,
+    record_content_size,
+    render_latest,
+    span,
+    timed_iter,
+)
 
 # =========================
 # APP CONFIG
@@ -38,53 +73,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(metrics_middleware)
+
 frontend_path = Path(__file__).parent.parent / "frontend"
 
 SECRET_KEY = "knowmap_secret_key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# =========================
-# DATABASE
-# =========================
-
-DATABASE_URL = "sqlite:///./knowmap.db"
-
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(bind=engine)
-Base = declarative_base()
-
-
-class User(Base):
-    __tablename__ = "users"
-
-    id = Column(Integer, primary_key=True)
-    username = Column(String, unique=True)
-    email = Column(String, unique=True)
-    hashed_password = Column(String)
-    interests = Column(String)
+# bcrypt runs on its own bounded pool so login bursts cannot starve the
+# threadpool that serves /process-data
+BCRYPT_ROUNDS = int(os.environ.get("KNOWMAP_BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.environ.get("KNOWMAP_BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.environ.get("KNOWMAP_BCRYPT_MAX_PENDING", "64"))
 
+TOKEN_CACHE_TTL_SECONDS = float(os.environ.get("KNOWMAP_TOKEN_CACHE_TTL", "60"))
+TOKEN_CACHE_SIZE = int(os.environ.get("KNOWMAP_TOKEN_CACHE_SIZE", "10000"))
 
-class UserGraph(Base):
-    __tablename__ = "user_graphs"
-
-    id = Column(Integer, primary_key=True)
-    username = Column(String)
-    source = Column(String)
-    topic = Column(String)
-    entities_json = Column(Text)
-    cross_links_json = Column(Text)
-    graph_json = Column(Text)
-    created_at = Column(String)
-
-
-Base.metadata.create_all(bind=engine)
+BATCH_MAX_DOCUMENTS = int(os.environ.get("KNOWMAP_BATCH_MAX_DOCUMENTS", "50"))
+BATCH_FETCH_CONCURRENCY = int(os.environ.get("KNOWMAP_BATCH_FETCH_CONCURRENCY", "4"))
+BATCH_NLP_BATCH_SIZE = int(os.environ.get("KNOWMAP_BATCH_NLP_BATCH_SIZE", "16"))
+BATCH_NLP_PROCESSES = int(os.environ.get("KNOWMAP_BATCH_NLP_PROCESSES", "1"))
 
 # =========================
 # PASSWORD HASHING
 # =========================
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS
+)
+
+password_executor = ThreadPoolExecutor(
+    max_workers=BCRYPT_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+_password_tasks_pending = 0
 
 
 def hash_password(password: str):
@@ -95,6 +120,22 @@ def verify_password(password: str, hashed_password: str):
     return pwd_context.verify(password, hashed_password)
 
 
+async def run_password_task(func, *args):
+    global _password_tasks_pending
+
+    # Shed load instead of queueing unbounded bcrypt work
+    if _password_tasks_pending >= BCRYPT_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Server busy, try again")
+
+    _password_tasks_pending += 1
+    try:
+        with span("password_hash"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        _password_tasks_pending -= 1
+
+
 def validate_password(password: str):
     import re
     return (
@@ -116,17 +157,47 @@ def create_access_token(data: dict):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# token -> (username, monotonic expiry)
+_token_cache = {}
+_token_cache_lock = threading.Lock()
+
+
+def _cache_token(token: str, username: str, payload: dict):
+    # Never cache a token past its own expiry
+    ttl = min(TOKEN_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+    if ttl <= 0:
+        return
+
+    with _token_cache_lock:
+        if token not in _token_cache and len(_token_cache) >= TOKEN_CACHE_SIZE:
+            _token_cache.pop(next(iter(_token_cache)))
+        _token_cache[token] = (username, time.monotonic() + ttl)
+
+
 def verify_token(auth_header: str):
     if not auth_header:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
+    _, _, token = auth_header.partition(" ")
+    if not token:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    cached = _token_cache.get(token)
+    if cached and cached[1] > time.monotonic():
+        record_cache("token", True)
+        return cached[0]
+
+    record_cache("token", False)
+
     try:
-        token = auth_header.split(" ")[1]
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    username = payload.get("sub")
+    _cache_token(token, username, payload)
+    return username
+
 # =========================
 # SCHEMAS
 # =========================
@@ -153,29 +224,41 @@ class ProcessSchema(BaseModel):
     topic: str
     content: str
 
-# =========================
-# DB DEPENDENCY
-# =========================
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class BatchSchema(BaseModel):
+    documents: list[ProcessSchema] = []
+    topics: list[FetchSchema] = []
+
+
+class FanoutSchema(BaseModel):
+    topic: str
+    sources: list[str] | None = None
+    arxiv_max_results: int | None = None
 
 # =========================
 # AUTH ROUTES
 # =========================
 
-@app.post("/register")
-def register(user: RegisterSchema, db: Session = Depends(get_db)):
+# Auth routes are async: database work goes to the default threadpool and
+# bcrypt to password_executor, so neither blocks the event loop.
 
-    existing = db.query(User).filter(
-        (User.username == user.username) |
-        (User.email == user.email)
+def _find_user(db: Session, username: str, email: str):
+    return db.query(User).filter(
+        (User.username == username) |
+        (User.email == email)
     ).first()
 
+
+def _save_user(db: Session, new_user: User):
+    db.add(new_user)
+    db.commit()
+
+
+@app.post("/register")
+async def register(user: RegisterSchema, db: Session = Depends(get_db)):
+
+    existing = await run_in_threadpool(_find_user, db, user.username, user.email)
+
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
 
@@ -185,25 +268,23 @@ def register(user: RegisterSchema, db: Session = Depends(get_db)):
     new_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=hash_password(user.password),
+        hashed_password=await run_password_task(hash_password, user.password),
         interests=",".join(user.interests)
     )
 
-    db.add(new_user)
-    db.commit()
+    await run_in_threadpool(_save_user, db, new_user)
 
     return {"message": "Registered successfully"}
 
 
 @app.post("/login")
-def login(user: LoginSchema, db: Session = Depends(get_db)):
+async def login(user: LoginSchema, db: Session = Depends(get_db)):
 
-    db_user = db.query(User).filter(
-        (User.username == user.username) |
-        (User.email == user.username)
-    ).first()
+    db_user = await run_in_threadpool(_find_user, db, user.username, user.username)
 
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user or not await run_password_task(
+        verify_password, user.password, db_user.hashed_password
+    ):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_access_token({"sub": db_user.username})
@@ -216,46 +297,8 @@ def login(user: LoginSchema, db: Session = Depends(get_db)):
 
 @app.post("/fetch-external")
 def fetch_external(data: FetchSchema):
-
-    source = data.source.lower()
-    topic = urllib.parse.quote(data.topic.strip())
-
-    if source == "wikipedia":
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{topic}"
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            raise HTTPException(status_code=404, detail="Wikipedia page not found")
-
-        wiki = response.json()
-        return {"content": wiki.get("extract", "")}
-
-    elif source == "arxiv":
-        url = f"http://export.arxiv.org/api/query?search_query=all:{topic}&max_results=5"
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            raise HTTPException(status_code=500, detail="arXiv fetch failed")
-
-        root = ET.fromstring(response.text)
-        summaries = []
-
-        for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-            summary = entry.find('{http://www.w3.org/2005/Atom}summary')
-            if summary is not None:
-                summaries.append(summary.text.strip())
-
-        return {"content": "\n\n".join(summaries)}
-
-    elif source == "kaggle":
-        # Placeholder (real Kaggle API requires credentials)
-        return {
-            "content": f"Kaggle dataset related to {data.topic}. "
-                       f"This dataset contains structured data useful for cross-domain mapping."
-        }
-
-    else:
-        raise HTTPException(status_code=400, detail="Invalid source")
+    documents = fetch_documents(data.source, data.topic)
+    return {"content": "\n\n".join(documents)}
 
 # =========================
 # FILE UPLOAD
@@ -276,38 +319,219 @@ def process_data(data: ProcessSchema,
                  Authorization: str = Header(None),
                  db: Session = Depends(get_db)):
 
-    username = verify_token(Authorization)
+    with span("auth"):
+        username = verify_token(Authorization)
+
+    record_content_size("/process-data", data.content)
+
+    with span("preprocess"):
+        text = preprocess_text(data.content)
+
+    new_graph, result, related = process_doc(
+        db, username, data.source, data.topic, text
+    )
+
+    return {
+        "graph_id": new_graph.id,
+        "entities": result["entities"],
+        "cross_domain_links": result["cross_domain_links"],
+        "graph": result["graph"],
+        "layout": result["layout"],
+        "related_graphs": related
+    }
+
+
+def process_doc(db: Session, username: str, source: str, topic: str, doc):
+    # Everything /process-data does with a parsed document; also driven
+    # by benchmarks/bench_pipeline.py so it times the same stages
+    result = analyze_doc(doc)
 
-    text = preprocess_text(data.content)
+    with span("json_dump"):
+        new_graph = make_graph_row(username, source, topic, result)
 
-    entities = extract_entities(text)
-    relations = extract_relations(text)
-    triples = build_triples(relations)
+    with span("db_commit"):
+        save_graphs(db, [new_graph])
 
-    graph = build_graph(triples)
-    graph_json = graph_to_json(graph)
+    with span("vector_index"):
+        words = graph_terms(topic, result["entities"], result["graph"])
+        vector = encode(words)
+        related = related_graphs(db, username, words, vector, exclude=[new_graph.id])
+        index_graphs([new_graph], [vector])
 
-    cross_links = detect_cross_domain(triples)
+    return new_graph, result, related
 
-    new_graph = UserGraph(
+
+def make_graph_row(username: str, source: str, topic: str, result: dict):
+    return UserGraph(
         username=username,
-        source=data.source,
-        topic=data.topic,
-        entities_json=json.dumps(entities),
-        cross_links_json=json.dumps(cross_links),
-        graph_json=json.dumps(graph_json),
+        source=source,
+        topic=topic,
+        entities_json=json.dumps(result["entities"]),
+        cross_links_json=json.dumps(result["cross_domain_links"]),
+        graph_json=json.dumps(result["graph"]),
+        layout_json=json.dumps(result["layout"]),
         created_at=str(datetime.utcnow())
     )
 
-    db.add(new_graph)
-    db.commit()
-    db.refresh(new_graph)
+# =========================
+# PROCESS BATCH
+# =========================
+
+def _fetch_topic(topic: FetchSchema):
+    try:
+        return fetch_external(topic)["content"], None
+    except HTTPException as e:
+        return None, e.detail
+    except (requests.RequestException, ET.ParseError, ValueError):
+        # Unreachable upstream or a reply that is not the expected XML/JSON
+        return None, f"{topic.source} fetch failed"
+
+
+@app.post("/process-batch")
+def process_batch(data: BatchSchema,
+                  Authorization: str = Header(None),
+                  db: Session = Depends(get_db)):
+
+    with span("auth"):
+        username = verify_token(Authorization)
+
+    total = len(data.documents) + len(data.topics)
+
+    if total == 0:
+        raise HTTPException(status_code=400, detail="No documents to process")
+
+    if total > BATCH_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch limited to {BATCH_MAX_DOCUMENTS} documents"
+        )
+
+    # (source, topic, content, error) per document, in request order
+    items = [(d.source, d.topic, d.content, None) for d in data.documents]
+
+    if data.topics:
+        with span("fetch"):
+            with ThreadPoolExecutor(max_workers=BATCH_FETCH_CONCURRENCY) as pool:
+                fetched = list(pool.map(_fetch_topic, data.topics))
+
+        items += [
+            (t.source, t.topic, content, error)
+            for t, (content, error) in zip(data.topics, fetched)
+        ]
+
+    results = [None] * len(items)
+    pending = []
+
+    for index, (source, topic, content, error) in enumerate(items):
+        if error is None and not content:
+            error = "Empty content"
+
+        if error is not None:
+            results[index] = {"source": source, "topic": topic, "error": error}
+        else:
+            record_content_size("/process-batch", content)
+            pending.append(index)
+
+    rows = []
+
+    with span("preprocess"):
+        docs = list(nlp.pipe(
+            (items[i][2] for i in pending),
+            batch_size=BATCH_NLP_BATCH_SIZE,
+            n_process=BATCH_NLP_PROCESSES
+        ))
+
+    for index, doc in zip(pending, docs):
+        source, topic = items[index][:2]
+        result = analyze_doc(doc)
+
+        with span("json_dump"):
+            rows.append(make_graph_row(username, source, topic, result))
+
+        results[index] = {
+            "source": source,
+            "topic": topic,
+            "entities": result["entities"],
+            "cross_domain_links": result["cross_domain_links"],
+            "graph": result["graph"],
+            "layout": result["layout"]
+        }
+
+    if rows:
+        with span("db_commit"):
+            save_graphs(db, rows)
+
+        with span("vector_index"):
+            index_graphs(rows)
+
+    for index, row in zip(pending, rows):
+        results[index]["graph_id"] = row.id
+
+    return {
+        "processed": len(rows),
+        "failed": len(items) - len(rows),
+        "results": results
+    }
+
+# =========================
+# PROCESS FAN-OUT
+# =========================
+
+@app.post("/process-fanout")
+def process_fanout(data: FanoutSchema,
+                   Authorization: str = Header(None),
+                   db: Session = Depends(get_db)):
+
+    with span("auth"):
+        username = verify_token(Authorization)
+
+    sources = [s.lower() for s in data.sources] if data.sources else None
+    max_results = min(
+        data.arxiv_max_results or FANOUT_ARXIV_MAX_RESULTS,
+        FANOUT_ARXIV_MAX_RESULTS
+    )
+
+    status = {}
+
+    # Documents stream from fetch through dedup into spaCy as each source
+    # completes, rather than waiting for every source
+    documents = deduplicate(
+        fan_out(data.topic, sources, max_results, status)
+    )
+    docs = timed_iter("fetch_and_parse", nlp.pipe(
+        documents,
+        as_tuples=True,
+        batch_size=BATCH_NLP_BATCH_SIZE
+    ))
+
+    result = analyze_corpus(docs)
+
+    if not result["documents"]:
+        raise HTTPException(status_code=404, detail={
+            "message": "No content found for topic",
+            "sources": status
+        })
+
+    source_label = "+".join(sorted(
+        name for name, info in status.items() if info["documents"]
+    ))
+
+    with span("json_dump"):
+        new_graph = make_graph_row(username, source_label, data.topic, result)
+
+    with span("db_commit"):
+        save_graphs(db, [new_graph])
+
+    with span("vector_index"):
+        index_graphs([new_graph])
 
     return {
         "graph_id": new_graph.id,
-        "entities": entities,
-        "cross_domain_links": cross_links,
-        "graph": graph_json
+        "sources": status,
+        "entities": result["entities"],
+        "cross_domain_links": result["cross_domain_links"],
+        "graph": result["graph"],
+        "layout": result["layout"]
     }
 
 # =========================
@@ -356,12 +580,132 @@ def get_single_graph(graph_id: int,
     if not graph:
         raise HTTPException(status_code=404, detail="Graph not found")
 
+    graph_json = json.loads(graph.graph_json)
+    layout = json.loads(graph.layout_json) if graph.layout_json else None
+
+    # Graphs saved before layouts existed, or changed since, are laid out
+    # once here, starting from any previous positions
+    if not layout_is_current(graph_json, layout):
+        with span("layout"):
+            layout = compute_layout(graph_json, previous=layout)
+
+        graph.layout_json = json.dumps(layout)
+        db.commit()
+
     return {
         "entities": json.loads(graph.entities_json),
         "cross_domain_links": json.loads(graph.cross_links_json),
-        "graph": json.loads(graph.graph_json)
+        "graph": graph_json,
+        "layout": layout
     }
 
+# =========================
+# SEMANTIC SEARCH
+# =========================
+
+@app.get("/search")
+def search_graphs(q: str,
+                  k: int = RELATED_GRAPHS_K,
+                  Authorization: str = Header(None),
+                  db: Session = Depends(get_db)):
+
+    username = verify_token(Authorization)
+
+    words = terms([q])
+    if not words:
+        raise HTTPException(status_code=400, detail="Empty query")
+
+    with span("vector_index"):
+        results = related_graphs(
+            db, username, words, encode(words), k=max(1, min(k, 50))
+        )
+
+    return {"results": results}
+
+# =========================
+# EXPORT
+# =========================
+
+def _check_export(fmt: str, table: str):
+    try:
+        validate_export(fmt, table)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _download(chunks, media_type: str, name: str):
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}"'}
+    )
+
+
+@app.get("/graph/{graph_id}/export")
+def export_single_graph(graph_id: int,
+                        format: str = "graphml",
+                        table: str = "edges",
+                        Authorization: str = Header(None),
+                        db: Session = Depends(get_db)):
+
+    username = verify_token(Authorization)
+    _check_export(format, table)
+
+    exists = db.query(UserGraph.id).filter(
+        UserGraph.id == graph_id,
+        UserGraph.username == username
+    ).first()
+
+    if not exists:
+        raise HTTPException(status_code=404, detail="Graph not found")
+
+    return _download(
+        export_graph(username, graph_id, format, table),
+        EXPORT_MEDIA_TYPES[format],
+        export_filename(format, graph_id, table)
+    )
+
+
+@app.get("/export")
+def export_all_graphs(format: str = "csv",
+                      Authorization: str = Header(None)):
+
+    username = verify_token(Authorization)
+    _check_export(format, "edges")
+
+    # Streams a zip of every saved graph without building it in memory
+    return _download(
+        export_archive(username, format),
+        EXPORT_MEDIA_TYPES["zip"],
+        export_filename(format)
+    )
+
+# =========================
+# CROSS-DOMAIN ANALYTICS
+# =========================
+
+@app.get("/cross-domain-summary")
+def get_cross_domain_summary(days: int = 30,
+                             top: int = 10,
+                             Authorization: str = Header(None),
+                             db: Session = Depends(get_db)):
+
+    username = verify_token(Authorization)
+
+    # Served from the summary tables kept current by save_graphs, so the
+    # cost does not grow with the number of saved graphs
+    return cross_domain_summary(
+        db, username, days=max(1, min(days, 365)), top=max(1, min(top, 100))
+    )
+
+# =========================
+# METRICS
+# =========================
+
+@app.get("/metrics")
+def metrics():
+    return Response(render_latest(), media_type=METRICS_CONTENT_TYPE)
+
 # =========================
 # FRONTEND SERVING
 # =========================
@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# =========================
+# CONFIG
+# =========================
+
+# Emit one structured JSON log line per request with its stage breakdown
+LOG_METRICS = os.environ.get("KNOWMAP_METRICS_LOG", "0") == "1"
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+logger = logging.getLogger("knowmap.metrics")
+
+if LOG_METRICS:
+    # uvicorn leaves this logger at WARNING, which would drop every line
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_request_spans = ContextVar("knowmap_request_spans", default=None)
+
+# =========================
+# METRIC TYPES
+# =========================
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        return self._values.get(key, 0)
+
+    def collect(self):
+        with self._lock:
+            items = list(self._values.items())
+
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (+Inf last), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        with self._lock:
+            items = [(k, (list(s[0]), s[1], s[2])) for k, s in self._series.items()]
+
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", bound))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "knowmap_http_request_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"]
+))
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "knowmap_stage_seconds",
+    "Time spent in each processing stage",
+    ["stage"]
+))
+
+REQUEST_CONTENT_CHARS = REGISTRY.register(Histogram(
+    "knowmap_request_content_chars",
+    "Size of submitted document content in characters",
+    ["endpoint"],
+    buckets=SIZE_BUCKETS
+))
+
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "knowmap_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"]
+))
+
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "knowmap_db_query_seconds",
+    "Database statement latency by statement type",
+    ["operation"]
+))
+
+# =========================
+# RECORDING HELPERS
+# =========================
+
+@contextmanager
+def span(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+
+        spans = _request_spans.get()
+        if spans is not None:
+            spans[stage] = spans.get(stage, 0.0) + elapsed
+
+
+@contextmanager
+def collect_spans():
+    # Seconds per stage for everything run inside, as the request log
+    # line reports them
+    spans = {}
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+def timed_iter(stage, iterable):
+    # Attribute time spent producing each item of a lazy iterable to a stage
+    iterator = iter(iterable)
+    while True:
+        with span(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def record_content_size(endpoint, content):
+    REQUEST_CONTENT_CHARS.observe(len(content or ""), endpoint=endpoint)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render_latest():
+    return REGISTRY.render()
+
+
+def instrument_engine(engine):
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("knowmap_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["knowmap_query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # A failed statement never reaches after_cursor_execute
+        conn = context.connection
+        if conn is not None and conn.info.get("knowmap_query_start"):
+            conn.info["knowmap_query_start"].pop()
+
+
+async def metrics_middleware(request, call_next):
+    spans = {} if LOG_METRICS else None
+    token = _request_spans.set(spans)
+    start = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _request_spans.reset(token)
+
+        # Label by route template so /graph/{graph_id} stays one series
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "static")
+
+        REQUEST_SECONDS.observe(
+            elapsed, method=request.method, route=route_path, status=status
+        )
+
+        if spans is not None:
+            logger.info(json.dumps({
+                "method": request.method,
+                "route": route_path,
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 3),
+                "stages_ms": {k: round(v * 1000, 3) for k, v in spans.items()},
+            }))
@@ -0,0 +1,133 @@
+import os
+
+from .ontology import ENTITY_ALIASES
+
+# Merge case/lemma variants, ontology aliases and pronouns into one node
+CANONICALIZE = os.environ.get("KNOWMAP_CANONICALIZE", "1") == "1"
+
+# Use the full noun chunk ("deep learning models") instead of its head
+EXPAND_NOUN_CHUNKS = os.environ.get("KNOWMAP_EXPAND_NOUN_CHUNKS", "0") == "1"
+
+PRONOUNS = {"it", "its", "they", "them", "this", "these", "those", "he", "she", "him", "her"}
+
+SUBJECT_DEPS = ("nsubj", "nsubjpass")
+ANTECEDENT_DEPS = ("nsubj", "nsubjpass", "dobj", "pobj", "attr")
+ANTECEDENT_WINDOW = 40
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+# Normalized alias -> canonical name, built once at import
+ALIAS_INDEX = {}
+for _canonical, _aliases in ENTITY_ALIASES.items():
+    for _alias in [_canonical] + _aliases:
+        ALIAS_INDEX[_normalize(_alias)] = _canonical
+
+
+class Canonicalizer:
+
+    def __init__(self, expand_noun_chunks=EXPAND_NOUN_CHUNKS):
+        self.expand_noun_chunks = expand_noun_chunks
+        self.names = {}
+        self._chunk_doc = None
+        self._chunk_index = {}
+
+    def _chunks(self, doc):
+        # Relations arrive in document order, so index one doc at a time
+        if doc is not self._chunk_doc:
+            self._chunk_doc = doc
+            self._chunk_index = {}
+            if doc.has_annotation("DEP"):
+                for chunk in doc.noun_chunks:
+                    for token in chunk:
+                        self._chunk_index[token.i] = chunk
+        return self._chunk_index
+
+    def _span(self, token):
+        if self.expand_noun_chunks:
+            chunk = self._chunks(token.doc).get(token.i)
+            if chunk is not None:
+                tokens = [t for t in chunk if t.pos_ != "DET"]
+                if tokens:
+                    return tokens
+        return [token]
+
+    def _antecedent(self, pronoun, exclude=None):
+        # Nearest preceding argument noun; a subject pronoun prefers the
+        # nearest subject. The subject of the pronoun's own verb and the
+        # relation's other argument are skipped, so "AI improves it" never
+        # resolves "it" to AI.
+        verb = pronoun.head.head if pronoun.dep_ == "pobj" else pronoun.head
+        is_subject = pronoun.dep_ in SUBJECT_DEPS
+        argument = other = None
+        start = max(0, pronoun.i - ANTECEDENT_WINDOW)
+
+        for token in reversed(pronoun.doc[start:pronoun.i]):
+            if token.pos_ not in ("NOUN", "PROPN"):
+                continue
+            if token.dep_ in SUBJECT_DEPS and token.head is verb:
+                continue
+            if exclude is not None and self._peek(token) == exclude:
+                continue
+
+            if token.dep_ in ANTECEDENT_DEPS:
+                if not is_subject or token.dep_ in SUBJECT_DEPS:
+                    return token
+                argument = argument or token
+            else:
+                other = other or token
+
+        return argument or other
+
+    def _lookup(self, token):
+        # (canonical name or None, lemma key, surface form)
+        tokens = self._span(token)
+        surface = " ".join(t.text for t in tokens)
+
+        canonical = ALIAS_INDEX.get(_normalize(surface))
+        if canonical is not None:
+            return canonical, None, surface
+
+        key = " ".join((t.lemma_ or t.text).lower() for t in tokens)
+        return ALIAS_INDEX.get(key), key, surface
+
+    def _peek(self, token):
+        # The name a token would get, without registering its surface form
+        canonical, key, surface = self._lookup(token)
+        return canonical or self.names.get(key, surface)
+
+    def name(self, token, exclude=None):
+        if token.lower_ in PRONOUNS:
+            antecedent = self._antecedent(token, exclude)
+            if antecedent is not None:
+                token = antecedent
+
+        canonical, key, surface = self._lookup(token)
+        if canonical is not None:
+            return canonical
+
+        # First surface form seen for a lemma key becomes the node name
+        return self.names.setdefault(key, surface)
+
+
+def canonicalize_relations(relation_tokens, canonicalizer=None):
+    canonicalizer = canonicalizer or Canonicalizer()
+    name = canonicalizer.name
+    relations = []
+
+    for subj, verb, obj in relation_tokens:
+        # Name the pronoun side last so it cannot resolve to the other side
+        if subj.lower_ in PRONOUNS and obj.lower_ not in PRONOUNS:
+            obj_name = name(obj)
+            subj_name = name(subj, exclude=obj_name)
+        else:
+            subj_name = name(subj)
+            obj_name = name(obj, exclude=subj_name)
+
+        # Aliases can still merge both ends into one node; drop the self-loop
+        if subj_name != obj_name:
+            relations.append((subj_name, verb.lemma_, obj_name))
+
+    return relations
@@ -23,12 +23,16 @@ def detect_cross_domain(triples):
             subj_domain != "Unknown" and
             obj_domain != "Unknown"
         ):
-            cross_links.append({
+            link = {
                 "subject": triple["subject"],
                 "relation": triple["relation"],
                 "object": triple["object"],
                 "subject_domain": subj_domain,
                 "object_domain": obj_domain
-            })
+            }
+            if "source" in triple:
+                link["source"] = triple["source"]
+
+            cross_links.append(link)
 
     return cross_links
@@ -12,18 +12,37 @@ def build_graph(triples):
         G.add_node(obj)
         G.add_edge(subj, obj, label=rel)
 
+        # Provenance for graphs merged from several sources
+        source = triple.get("source")
+        if source is not None:
+            for key in (G.nodes[subj], G.nodes[obj], G[subj][obj]):
+                sources = key.setdefault("sources", [])
+                if source not in sources:
+                    sources.append(source)
+
     return G
 
 
 def graph_to_json(G):
+    nodes = []
+    for n, attrs in G.nodes(data=True):
+        node = {"id": n}
+        if "sources" in attrs:
+            node["sources"] = attrs["sources"]
+        nodes.append(node)
+
+    edges = []
+    for u, v, attrs in G.edges(data=True):
+        edge = {
+            "source": u,
+            "target": v,
+            "label": attrs["label"]
+        }
+        if "sources" in attrs:
+            edge["sources"] = attrs["sources"]
+        edges.append(edge)
+
     return {
-        "nodes": [{"id": n} for n in G.nodes()],
-        "edges": [
-            {
-                "source": u,
-                "target": v,
-                "label": G[u][v]["label"]
-            }
-            for u, v in G.edges()
-        ]
+        "nodes": nodes,
+        "edges": edges
     }
@@ -0,0 +1,169 @@
+import os
+import zlib
+
+import numpy as np
+
+# Force-directed (Fruchterman-Reingold) layout computed once on the server
+# and stored with the graph, so clients draw without simulating
+LAYOUT_ITERATIONS = int(os.environ.get("KNOWMAP_LAYOUT_ITERATIONS", "50"))
+LAYOUT_INCREMENTAL_ITERATIONS = int(
+    os.environ.get("KNOWMAP_LAYOUT_INCREMENTAL_ITERATIONS", "15")
+)
+
+# Above this many nodes, repulsion is estimated from a fixed random sample
+# of nodes, keeping each iteration O(n * sample) instead of O(n^2)
+LAYOUT_REPULSION_SAMPLE = int(os.environ.get("KNOWMAP_LAYOUT_REPULSION_SAMPLE", "1000"))
+
+# Layouts run on the request thread, so large graphs (merged fan-out
+# results) get fewer iterations: at most this many repulsion pairs in
+# total, but never fewer than LAYOUT_MIN_ITERATIONS
+LAYOUT_MAX_PAIRS = int(os.environ.get("KNOWMAP_LAYOUT_MAX_PAIRS", "20000000"))
+LAYOUT_MIN_ITERATIONS = 5
+
+# Rows of the pairwise repulsion computed at once, to bound memory
+CHUNK_SIZE = 512
+
+START_TEMPERATURE = 0.1
+INCREMENTAL_TEMPERATURE = 0.02
+GRAVITY = 0.5
+PRECISION = 4
+
+
+def _seed_position(node_id):
+    # Stable pseudo-random start, so a graph always lays out the same way
+    h = zlib.crc32(str(node_id).encode("utf-8"))
+    return (h & 0xFFFF) / 0xFFFF, (h >> 16) / 0xFFFF
+
+
+def _initial_positions(ids, edges, previous):
+    pos = np.array([_seed_position(n) for n in ids], dtype=np.float64)
+    if not previous:
+        return pos, 0
+
+    known = np.zeros(len(ids), dtype=bool)
+    for i, node_id in enumerate(ids):
+        if node_id in previous:
+            pos[i] = previous[node_id]
+            known[i] = True
+
+    # New nodes start next to their already placed neighbours
+    neighbour_sum = np.zeros_like(pos)
+    neighbour_count = np.zeros(len(ids))
+    for u, v in edges:
+        for a, b in ((u, v), (v, u)):
+            if known[b] and not known[a]:
+                neighbour_sum[a] += pos[b]
+                neighbour_count[a] += 1
+
+    placed = neighbour_count > 0
+    jitter = (pos[placed] - 0.5) * 0.05
+    pos[placed] = neighbour_sum[placed] / neighbour_count[placed, None] + jitter
+
+    return pos, int(known.sum())
+
+
+def _repulsion(pos, k, rng):
+    n = len(pos)
+    disp = np.zeros_like(pos)
+
+    if n > LAYOUT_REPULSION_SAMPLE:
+        others = pos[rng.choice(n, LAYOUT_REPULSION_SAMPLE, replace=False)]
+        scale = n / LAYOUT_REPULSION_SAMPLE
+    else:
+        others = pos
+        scale = 1.0
+
+    ox, oy = others[:, 0], others[:, 1]
+
+    for start in range(0, n, CHUNK_SIZE):
+        block = pos[start:start + CHUNK_SIZE]
+        dx = block[:, 0, None] - ox
+        dy = block[:, 1, None] - oy
+        dist2 = dx * dx + dy * dy
+        np.maximum(dist2, 1e-9, out=dist2)
+        # k^2 / d along the unit vector is k^2 * delta / d^2
+        weight = (k * k * scale) / dist2
+        disp[start:start + CHUNK_SIZE, 0] = (dx * weight).sum(axis=1)
+        disp[start:start + CHUNK_SIZE, 1] = (dy * weight).sum(axis=1)
+
+    return disp
+
+
+def _iteration_budget(n, iterations):
+    pairs = n * min(n, LAYOUT_REPULSION_SAMPLE)
+    return min(iterations, max(LAYOUT_MAX_PAIRS // pairs, LAYOUT_MIN_ITERATIONS))
+
+
+def _force_directed(pos, u, v, iterations, temperature):
+    n = len(pos)
+    k = np.sqrt(1.0 / n)
+    rng = np.random.default_rng(0)
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        disp = _repulsion(pos, k, rng)
+
+        # Attraction d^2 / k along each edge
+        delta = pos[u] - pos[v]
+        dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        force = delta * (dist / k)[:, None]
+        np.subtract.at(disp, u, force)
+        np.add.at(disp, v, force)
+
+        # Weak pull to the centre keeps disconnected pieces in view
+        disp -= GRAVITY * (pos - pos.mean(axis=0))
+
+        length = np.sqrt(np.einsum("ij,ij->i", disp, disp))
+        np.maximum(length, 1e-9, out=length)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+
+        temperature -= cooling
+
+    return pos
+
+
+def _normalize(pos):
+    pos = pos - pos.min(axis=0)
+    extent = pos.max()
+    if extent > 0:
+        pos /= extent
+    return pos
+
+
+def layout_is_current(graph_json, layout):
+    if layout is None:
+        return False
+    return set(layout) == {node["id"] for node in graph_json["nodes"]}
+
+
+def compute_layout(graph_json, previous=None):
+    # Returns {node id: [x, y]} in the unit square. With a previous layout,
+    # existing nodes keep their positions and only settle for a few
+    # iterations, so a changed graph does not jump around when redrawn.
+    ids = [node["id"] for node in graph_json["nodes"]]
+    if not ids:
+        return {}
+    if len(ids) == 1:
+        return {ids[0]: [0.5, 0.5]}
+
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    edges = np.array(
+        [(index[e["source"]], index[e["target"]]) for e in graph_json["edges"]],
+        dtype=np.intp
+    ).reshape(-1, 2)
+
+    pos, known = _initial_positions(ids, edges, previous)
+
+    if known == len(ids):
+        return {node_id: list(previous[node_id]) for node_id in ids}
+
+    if known:
+        iterations, temperature = LAYOUT_INCREMENTAL_ITERATIONS, INCREMENTAL_TEMPERATURE
+    else:
+        iterations, temperature = LAYOUT_ITERATIONS, START_TEMPERATURE
+
+    iterations = _iteration_budget(len(ids), iterations)
+    pos = _force_directed(pos, edges[:, 0], edges[:, 1], iterations, temperature)
+    pos = np.round(_normalize(pos), PRECISION)
+
+    return {node_id: pos[i].tolist() for i, node_id in enumerate(ids)}
@@ -1,7 +1,7 @@
-from .preprocessing import nlp
+from .preprocessing import as_doc
 
 def extract_entities(text: str):
-    doc = nlp(text)
+    doc = as_doc(text)
     entities = []
 
     for ent in doc.ents:
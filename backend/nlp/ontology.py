@@ -16,3 +16,28 @@ DOMAIN_KEYWORDS = {
         "investment"
     ]
 }
+
+# Canonical entity name -> surface forms that should merge into it
+ENTITY_ALIASES = {
+    "AI": [
+        "ai", "a.i.", "artificial intelligence"
+    ],
+    "Machine Learning": [
+        "machine learning", "ml"
+    ],
+    "Neural Network": [
+        "neural network", "neural networks", "neural net", "nn"
+    ],
+    "Healthcare": [
+        "healthcare", "health care"
+    ],
+    "Climate Change": [
+        "climate change", "climate crisis"
+    ],
+    "Carbon Dioxide": [
+        "carbon dioxide", "co2"
+    ],
+    "Economy": [
+        "economy", "economies"
+    ]
+}
\ No newline at end of file
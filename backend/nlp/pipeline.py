@@ -0,0 +1,96 @@
+from ..metrics import span
+from .ner import extract_entities
+from .relation_extraction import extract_relations, extract_relation_tokens
+from .canonicalize import CANONICALIZE, Canonicalizer, canonicalize_relations
+from .triples import build_triples
+from .graph_builder import build_graph, graph_to_json
+from .layout import compute_layout
+from .cross_domain import detect_cross_domain
+
+
+def _relations(doc, canonicalizer):
+    if canonicalizer is None:
+        with span("relations"):
+            return extract_relations(doc)
+
+    with span("relations"):
+        relation_tokens = extract_relation_tokens(doc)
+
+    with span("canonicalize"):
+        return canonicalize_relations(relation_tokens, canonicalizer)
+
+
+def analyze_doc(doc, canonicalize=CANONICALIZE):
+    canonicalizer = Canonicalizer() if canonicalize else None
+
+    with span("ner"):
+        entities = extract_entities(doc)
+
+    relations = _relations(doc, canonicalizer)
+
+    with span("triples"):
+        triples = build_triples(relations)
+
+    with span("graph"):
+        graph = build_graph(triples)
+        graph_json = graph_to_json(graph)
+
+    with span("layout"):
+        layout = compute_layout(graph_json)
+
+    with span("cross_domain"):
+        cross_links = detect_cross_domain(triples)
+
+    return {
+        "entities": entities,
+        "triples": triples,
+        "cross_domain_links": cross_links,
+        "graph": graph_json,
+        "layout": layout
+    }
+
+
+def analyze_corpus(docs, canonicalize=CANONICALIZE):
+    # docs yields (Doc, source) pairs; the result is one merged graph
+    # whose nodes, edges, entities and links carry their sources.
+    # One canonicalizer spans the corpus so names agree across documents.
+    canonicalizer = Canonicalizer() if canonicalize else None
+    entities = {}
+    triples = []
+    documents = 0
+
+    for doc, source in docs:
+        documents += 1
+
+        with span("ner"):
+            for entity in extract_entities(doc):
+                key = (entity["text"], entity["label"])
+                merged = entities.setdefault(key, dict(entity, sources=[]))
+                if source not in merged["sources"]:
+                    merged["sources"].append(source)
+
+        relations = _relations(doc, canonicalizer)
+
+        with span("triples"):
+            for triple in build_triples(relations):
+                triple["source"] = source
+                triples.append(triple)
+
+    with span("graph"):
+        graph = build_graph(triples)
+        graph_json = graph_to_json(graph)
+
+    with span("layout"):
+        layout = compute_layout(graph_json)
+
+    with span("cross_domain"):
+        cross_links = detect_cross_domain(triples)
+
+    return {
+        "documents": documents,
+        "entities": list(entities.values()),
+        "triples": triples,
+        "cross_domain_links": cross_links,
+        "graph": graph_json,
+        "layout": layout
+    }
@@ -1,8 +1,16 @@
 import spacy
+from spacy.tokens import Doc
 
 # Load model once (global)
 nlp = spacy.load("en_core_web_sm")
 
+def as_doc(text):
+    # Stages accept an already parsed Doc so one parse serves them all
+    if isinstance(text, Doc):
+        return text
+    return nlp(text)
+
+
 def preprocess_text(text: str):
     if not text:
         return None
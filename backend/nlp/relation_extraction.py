@@ -1,21 +1,28 @@
-from .preprocessing import nlp
+from .preprocessing import as_doc
 
-def extract_relations(text: str):
-    doc = nlp(text)
+def extract_relation_tokens(text):
+    doc = as_doc(text)
     relations = []
 
     for sent in doc.sents:
         for token in sent:
             if token.pos_ == "VERB":
 
-                subjects = [w.text for w in token.lefts
+                subjects = [w for w in token.lefts
                             if w.dep_ in ("nsubj", "nsubjpass")]
 
-                objects = [w.text for w in token.rights
+                objects = [w for w in token.rights
                            if w.dep_ in ("dobj", "pobj", "attr")]
 
                 for subj in subjects:
                     for obj in objects:
-                        relations.append((subj, token.lemma_, obj))
+                        relations.append((subj, token, obj))
 
     return relations
+
+
+def extract_relations(text: str):
+    return [
+        (subj.text, verb.lemma_, obj.text)
+        for subj, verb, obj in extract_relation_tokens(text)
+    ]
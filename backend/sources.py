@@ -0,0 +1,158 @@
+import hashlib
+import os
+import re
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from fastapi import HTTPException
+
+# =========================
+# CONFIG
+# =========================
+
+# Upstream APIs can be pointed at a local stub for load testing
+WIKIPEDIA_API_URL = os.environ.get(
+    "KNOWMAP_WIKIPEDIA_URL", "https://en.wikipedia.org/api/rest_v1"
+)
+ARXIV_API_URL = os.environ.get("KNOWMAP_ARXIV_URL", "http://export.arxiv.org/api")
+UPSTREAM_TIMEOUT = float(os.environ.get("KNOWMAP_UPSTREAM_TIMEOUT", "10"))
+
+ARXIV_PAGE_SIZE = int(os.environ.get("KNOWMAP_ARXIV_PAGE_SIZE", "25"))
+FANOUT_ARXIV_MAX_RESULTS = int(os.environ.get("KNOWMAP_FANOUT_ARXIV_MAX_RESULTS", "50"))
+FANOUT_SOURCES = [
+    s.strip() for s in
+    os.environ.get("KNOWMAP_FANOUT_SOURCES", "wikipedia,arxiv").split(",")
+    if s.strip()
+]
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+OPENSEARCH = "{http://a9.com/-/spec/opensearch/1.1/}"
+
+# =========================
+# SOURCES
+# =========================
+
+def fetch_wikipedia(topic: str, **options):
+    url = f"{WIKIPEDIA_API_URL}/page/summary/{urllib.parse.quote(topic)}"
+    response = requests.get(url, timeout=UPSTREAM_TIMEOUT)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=404, detail="Wikipedia page not found")
+
+    extract = response.json().get("extract", "")
+    return [extract] if extract else []
+
+
+def fetch_arxiv(topic: str, max_results: int = 5, page_size: int = ARXIV_PAGE_SIZE):
+    query = urllib.parse.quote(topic)
+    summaries = []
+    start = 0
+
+    while start < max_results:
+        count = min(page_size, max_results - start)
+        url = (f"{ARXIV_API_URL}/query?search_query=all:{query}"
+               f"&start={start}&max_results={count}")
+        response = requests.get(url, timeout=UPSTREAM_TIMEOUT)
+
+        if response.status_code != 200:
+            raise HTTPException(status_code=500, detail="arXiv fetch failed")
+
+        root = ET.fromstring(response.text)
+        entries = root.findall(f"{ATOM}entry")
+
+        for entry in entries:
+            summary = entry.find(f"{ATOM}summary")
+            if summary is not None and summary.text:
+                summaries.append(summary.text.strip())
+
+        total = root.find(f"{OPENSEARCH}totalResults")
+        start += count
+
+        if len(entries) < count or (total is not None and start >= int(total.text)):
+            break
+
+    return summaries
+
+
+def fetch_kaggle(topic: str, **options):
+    # Placeholder (real Kaggle API requires credentials)
+    return [
+        f"Kaggle dataset related to {topic}. "
+        f"This dataset contains structured data useful for cross-domain mapping."
+    ]
+
+
+SOURCES = {
+    "wikipedia": fetch_wikipedia,
+    "arxiv": fetch_arxiv,
+    "kaggle": fetch_kaggle,
+}
+
+
+def fetch_documents(source: str, topic: str, **options):
+    fetch = SOURCES.get(source.lower())
+    if fetch is None:
+        raise HTTPException(status_code=400, detail="Invalid source")
+    return fetch(topic.strip(), **options)
+
+# =========================
+# FAN-OUT
+# =========================
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def _fingerprint(text: str):
+    normalized = " ".join(text.lower().split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+def deduplicate(documents, seen=None):
+    # Drop sentences already seen in earlier documents, from any source
+    seen = set() if seen is None else seen
+
+    for text, source in documents:
+        kept = []
+        for sentence in _SENTENCE_SPLIT.split(text):
+            if not sentence.strip():
+                continue
+            key = _fingerprint(sentence)
+            if key not in seen:
+                seen.add(key)
+                kept.append(sentence)
+
+        if kept:
+            yield " ".join(kept), source
+
+
+def fan_out(topic: str, sources=None, arxiv_max_results=FANOUT_ARXIV_MAX_RESULTS,
+            status=None):
+    # Yields (text, source) as each source finishes; per-source document
+    # counts or errors are recorded in status
+    sources = sources or FANOUT_SOURCES
+    status = {} if status is None else status
+
+    options = {"arxiv": {"max_results": arxiv_max_results}}
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        futures = {
+            pool.submit(fetch_documents, source, topic, **options.get(source, {})): source
+            for source in sources
+        }
+
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                documents = future.result()
+            except HTTPException as e:
+                status[source] = {"documents": 0, "error": e.detail}
+                continue
+            except (requests.RequestException, ET.ParseError, ValueError):
+                status[source] = {"documents": 0, "error": f"{source} fetch failed"}
+                continue
+
+            status[source] = {"documents": len(documents)}
+            for text in documents:
+                yield text, source
@@ -0,0 +1,604 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# =========================
+# CONFIG
+# =========================
+
+VECTOR_INDEX = os.environ.get("KNOWMAP_VECTOR_INDEX", "1") == "1"
+VECTOR_INDEX_DIR = Path(os.environ.get("KNOWMAP_VECTOR_INDEX_DIR", "./vector_index"))
+
+# "spacy" averages static word vectors and needs a model that ships them
+# (en_core_web_md/lg); "hash" is signed feature hashing of graph terms and
+# works with any model. The default picks spacy only when vectors exist.
+VECTOR_ENCODER = os.environ.get("KNOWMAP_VECTOR_ENCODER", "auto")
+HASH_DIM = int(os.environ.get("KNOWMAP_VECTOR_HASH_DIM", "256"))
+
+RELATED_GRAPHS_K = int(os.environ.get("KNOWMAP_RELATED_GRAPHS_K", "5"))
+RELATED_MIN_SCORE = float(os.environ.get("KNOWMAP_RELATED_MIN_SCORE", "0.1"))
+
+# Open indexes hold memory-mapped views and inverted lists; only the most
+# recently used ones stay open
+VECTOR_INDEX_CACHE_SIZE = int(os.environ.get("KNOWMAP_VECTOR_INDEX_CACHE_SIZE", "64"))
+
+# Below IVF_MIN_VECTORS a user's index is searched exhaustively. Above it,
+# vectors are clustered (IVF) and a query scans only the IVF_NPROBE
+# nearest clusters. Retraining happens inline each time the index grows
+# IVF_RETRAIN_FACTOR-fold, up to IVF_AUTO_TRAIN_MAX vectors; larger
+# indexes are retrained with `python -m backend.vector_index --train`.
+IVF_MIN_VECTORS = int(os.environ.get("KNOWMAP_IVF_MIN_VECTORS", "10000"))
+IVF_NPROBE = int(os.environ.get("KNOWMAP_IVF_NPROBE", "16"))
+IVF_MAX_LISTS = int(os.environ.get("KNOWMAP_IVF_MAX_LISTS", "1024"))
+IVF_RETRAIN_FACTOR = 4
+IVF_AUTO_TRAIN_MAX = int(os.environ.get("KNOWMAP_IVF_AUTO_TRAIN_MAX", "250000"))
+
+KMEANS_ITERATIONS = 8
+KMEANS_POINTS_PER_LIST = 32
+
+# Rows scored per matrix multiply, to bound memory on large indexes
+SEARCH_CHUNK_ROWS = 65536
+
+MAX_SHARED_ENTITIES = 10
+
+# =========================
+# ENCODING
+# =========================
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "was",
+    "with",
+}
+
+
+def terms(texts):
+    words = set()
+    for text in texts:
+        for word in _WORD.findall(str(text).lower()):
+            if len(word) > 1 and word not in STOP_WORDS:
+                words.add(word)
+    return words
+
+
+def graph_terms(topic, entities, graph_json):
+    return terms(
+        [topic] +
+        [e["text"] for e in entities] +
+        [n["id"] for n in graph_json["nodes"]]
+    )
+
+
+@lru_cache(maxsize=100000)
+def _hash_bucket(word):
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+    bucket = int.from_bytes(digest[:4], "little") % HASH_DIM
+    return bucket, 1.0 if digest[4] & 1 else -1.0
+
+
+class HashEncoder:
+    name = "hash"
+    dim = HASH_DIM
+
+    def encode(self, words):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in words:
+            bucket, sign = _hash_bucket(word)
+            vector[bucket] += sign
+        return vector
+
+
+class SpacyEncoder:
+    name = "spacy"
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self.dim = vocab.vectors_length
+
+    def encode(self, words):
+        vectors = [self.vocab[w].vector for w in words if self.vocab.has_vector(w)]
+        if not vectors:
+            return np.zeros(self.dim, dtype=np.float32)
+        return np.mean(vectors, axis=0).astype(np.float32)
+
+
+@lru_cache(maxsize=1)
+def encoder():
+    if VECTOR_ENCODER == "hash":
+        return HashEncoder()
+
+    from .nlp.preprocessing import nlp
+
+    if VECTOR_ENCODER == "spacy" or nlp.vocab.vectors_length:
+        return SpacyEncoder(nlp.vocab)
+    return HashEncoder()
+
+
+def encode(words):
+    # Unit length, so inner product is cosine similarity; None if the
+    # words carry no signal
+    vector = encoder().encode(words)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return vector / norm
+
+# =========================
+# FILE LOCK
+# =========================
+
+@contextmanager
+def _file_lock(path):
+    # Serializes writers across threads and uvicorn worker processes
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# =========================
+# INDEX
+# =========================
+
+def _rows(path, row_bytes):
+    try:
+        return path.stat().st_size // row_bytes
+    except FileNotFoundError:
+        return 0
+
+
+def _replace(path, array):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp, path)
+
+
+def _nearest(vectors, centroids):
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_CHUNK_ROWS):
+        block = np.asarray(vectors[start:start + SEARCH_CHUNK_ROWS])
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class VectorIndex:
+    # Append-only float32 matrix of unit vectors with parallel graph ids,
+    # both raw files read through np.memmap. Once trained, lists.i32 holds
+    # each row's cluster and centroids.npy the cluster centres.
+
+    def __init__(self, path, dim, encoder_name):
+        self.path = Path(path)
+        self.dim = dim
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.vectors_path = self.path / "vectors.f32"
+        self.ids_path = self.path / "ids.i64"
+        self.lists_path = self.path / "lists.i32"
+        self.centroids_path = self.path / "centroids.npy"
+        self.meta_path = self.path / "meta.json"
+        self.lock_path = self.path / "lock"
+
+        self._view = None
+        self._view_lock = threading.Lock()
+
+        with _file_lock(self.lock_path):
+            meta = self._read_meta()
+            if meta.get("dim") != dim or meta.get("encoder") != encoder_name:
+                # Vectors from another encoder are not comparable; start over
+                # (re-encode saved graphs with --rebuild)
+                self._clear()
+                self._write_meta({"dim": dim, "encoder": encoder_name, "trained_rows": 0})
+
+    def _read_meta(self):
+        try:
+            return json.loads(self.meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_meta(self, meta):
+        tmp = self.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.meta_path)
+
+    def _clear(self):
+        for path in (self.vectors_path, self.ids_path, self.lists_path, self.centroids_path):
+            if path.exists():
+                path.unlink()
+
+    def __len__(self):
+        # Appends are not atomic across files, so only count complete rows
+        return min(
+            _rows(self.vectors_path, self.dim * 4),
+            _rows(self.ids_path, 8)
+        )
+
+    # ---------- writes ----------
+
+    def add(self, graph_ids, vectors, auto_train=True):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        graph_ids = np.asarray(graph_ids, dtype=np.int64)
+
+        with _file_lock(self.lock_path):
+            n = len(self)
+            centroids = self._centroids()
+
+            with open(self.vectors_path, "r+b" if n else "wb") as f:
+                f.seek(n * self.dim * 4)
+                f.write(vectors.tobytes())
+                f.truncate()
+            with open(self.ids_path, "r+b" if n else "wb") as f:
+                f.seek(n * 8)
+                f.write(graph_ids.tobytes())
+                f.truncate()
+
+            n += len(vectors)
+
+            if centroids is not None:
+                # Also covers rows an interrupted append left unassigned
+                listed = min(_rows(self.lists_path, 4), n)
+                stored = np.memmap(
+                    self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim)
+                )
+                with open(self.lists_path, "r+b" if listed else "wb") as f:
+                    f.seek(listed * 4)
+                    f.write(_nearest(stored[listed:], centroids).tobytes())
+                    f.truncate()
+
+            trained_rows = self._read_meta().get("trained_rows", 0)
+
+            if auto_train and IVF_MIN_VECTORS <= n <= IVF_AUTO_TRAIN_MAX and (
+                not trained_rows or n >= trained_rows * IVF_RETRAIN_FACTOR
+            ):
+                self._train(n)
+
+    def train(self, lists=None):
+        with _file_lock(self.lock_path):
+            self._train(len(self), lists)
+
+    def _train(self, n, lists=None):
+        # Spherical k-means on a sample, then every row is assigned
+        if n == 0:
+            return
+
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        lists = lists or int(min(IVF_MAX_LISTS, max(1, 4 * np.sqrt(n))))
+        lists = min(lists, n)
+
+        rng = np.random.default_rng(0)
+        sample_size = min(n, lists * KMEANS_POINTS_PER_LIST)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, lists, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = _nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centre
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        # lists first: readers reload when centroids.npy changes
+        _replace(self.lists_path, _nearest(vectors, centroids))
+        tmp = self.path / "centroids.tmp.npy"
+        np.save(tmp, centroids)
+        os.replace(tmp, self.centroids_path)
+
+        meta = self._read_meta()
+        meta["trained_rows"] = n
+        self._write_meta(meta)
+
+    def _centroids(self):
+        try:
+            return np.load(self.centroids_path)
+        except FileNotFoundError:
+            return None
+
+    # ---------- reads ----------
+
+    def _load_view(self, n):
+        try:
+            version = self.centroids_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            version = None
+
+        view = self._view
+        if view is not None and view["n"] == n and view["version"] == version:
+            return view
+
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(n,))
+        view = {"n": n, "version": version, "vectors": vectors, "ids": ids,
+                "centroids": None, "listed": 0}
+
+        if version is not None:
+            # Inverted lists: row numbers grouped by cluster. Rows appended
+            # after the lists were read are scanned exhaustively.
+            previous = self._view
+            if previous is not None and previous["version"] == version \
+                    and n - previous["listed"] <= IVF_MIN_VECTORS:
+                for key in ("centroids", "order", "offsets", "listed"):
+                    view[key] = previous[key]
+            else:
+                centroids = self._centroids()
+                listed = min(n, _rows(self.lists_path, 4))
+                assignments = np.fromfile(self.lists_path, dtype=np.int32, count=listed)
+                view["centroids"] = centroids
+                view["order"] = np.argsort(assignments, kind="stable").astype(np.int64)
+                view["offsets"] = np.searchsorted(
+                    assignments[view["order"]], np.arange(len(centroids) + 1)
+                )
+                view["listed"] = listed
+
+        self._view = view
+        return view
+
+    def search(self, vector, k=RELATED_GRAPHS_K, nprobe=IVF_NPROBE, exclude=()):
+        n = len(self)
+        if n == 0:
+            return []
+
+        with self._view_lock:
+            view = self._load_view(n)
+
+        query = np.asarray(vector, dtype=np.float32)
+        vectors = view["vectors"]
+
+        if view["centroids"] is None:
+            rows = None
+        else:
+            probe = np.argsort(view["centroids"] @ query)[::-1][:nprobe]
+            offsets, order = view["offsets"], view["order"]
+            rows = np.concatenate(
+                [order[offsets[c]:offsets[c + 1]] for c in probe] +
+                [np.arange(view["listed"], n)]
+            )
+            rows.sort()
+
+        # Score candidates chunk by chunk, keeping the best k + len(exclude)
+        keep = k + len(exclude)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        total = n if rows is None else len(rows)
+
+        for start in range(0, total, SEARCH_CHUNK_ROWS):
+            if rows is None:
+                chunk_rows = np.arange(start, min(start + SEARCH_CHUNK_ROWS, n))
+                block = vectors[start:start + SEARCH_CHUNK_ROWS]
+            else:
+                chunk_rows = rows[start:start + SEARCH_CHUNK_ROWS]
+                block = vectors[chunk_rows]
+
+            scores = np.asarray(block) @ query
+            best_rows = np.concatenate([best_rows, chunk_rows])
+            best_scores = np.concatenate([best_scores, scores])
+
+            if len(best_scores) > keep:
+                top = np.argpartition(best_scores, -keep)[-keep:]
+                best_rows, best_scores = best_rows[top], best_scores[top]
+
+        results = []
+        seen = set(exclude)
+        for i in np.argsort(best_scores)[::-1]:
+            graph_id = int(view["ids"][best_rows[i]])
+            # A graph saved while its index was rebuilt can appear twice
+            if graph_id in seen:
+                continue
+            seen.add(graph_id)
+            results.append((graph_id, float(best_scores[i])))
+            if len(results) == k:
+                break
+
+        return results
+
+# =========================
+# PER-USER INDEXES
+# =========================
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def user_path(username):
+    # Usernames are user input, so never use them as a path directly
+    key = hashlib.blake2b(username.encode("utf-8"), digest_size=12).hexdigest()
+    return VECTOR_INDEX_DIR / key
+
+
+def index_for(username):
+    with _indexes_lock:
+        index = _indexes.get(username)
+        if index is None:
+            enc = encoder()
+            index = VectorIndex(user_path(username), enc.dim, enc.name)
+            _indexes[username] = index
+            while len(_indexes) > VECTOR_INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(username)
+        return index
+
+
+def row_terms(row):
+    return graph_terms(
+        row.topic,
+        json.loads(row.entities_json),
+        json.loads(row.graph_json)
+    )
+
+
+def index_graphs(rows, vectors=None):
+    # Appends saved UserGraph rows to their owners' indexes. Rows whose
+    # text encodes to nothing are skipped.
+    if not VECTOR_INDEX:
+        return
+
+    by_user = {}
+    for i, row in enumerate(rows):
+        vector = vectors[i] if vectors is not None else encode(row_terms(row))
+        if vector is not None:
+            ids, vecs = by_user.setdefault(row.username, ([], []))
+            ids.append(row.id)
+            vecs.append(vector)
+
+    for username, (ids, vecs) in by_user.items():
+        index_for(username).add(ids, vecs)
+
+
+def related_graphs(db, username, words, vector, k=RELATED_GRAPHS_K, exclude=()):
+    # vector is encode(words), computed by the caller so /process-data can
+    # index the same vector; words pick the shared entities
+    from .database import UserGraph
+
+    if not VECTOR_INDEX or vector is None:
+        return []
+
+    hits = [
+        (graph_id, score)
+        for graph_id, score in index_for(username).search(vector, k=k, exclude=set(exclude))
+        if score >= RELATED_MIN_SCORE
+    ]
+    if not hits:
+        return []
+
+    graphs = {
+        g.id: g for g in db.query(UserGraph).filter(
+            UserGraph.id.in_([graph_id for graph_id, _ in hits]),
+            UserGraph.username == username
+        )
+    }
+
+    results = []
+    for graph_id, score in hits:
+        graph = graphs.get(graph_id)
+        if graph is None:
+            continue
+
+        nodes = json.loads(graph.graph_json)["nodes"]
+        shared = [n["id"] for n in nodes if terms([n["id"]]) & words]
+
+        results.append({
+            "graph_id": graph_id,
+            "topic": graph.topic,
+            "source": graph.source,
+            "created_at": graph.created_at,
+            "score": round(score, 4),
+            "shared_entities": shared[:MAX_SHARED_ENTITIES]
+        })
+
+    return results
+
+# =========================
+# REBUILD
+# =========================
+
+INDEX_FILES = ("vectors.f32", "ids.i64", "lists.i32", "centroids.npy", "meta.json")
+
+
+def _rebuild_user(db, username, batch_size):
+    from .database import UserGraph
+
+    enc = encoder()
+    path = user_path(username)
+    path.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(path.name + ".rebuild")
+
+    # Running workers keep their VectorIndex for this path and append under
+    # its lock, so hold it while the new index is built next to the live
+    # one, then swap the files in place
+    with _file_lock(path / "lock"):
+        shutil.rmtree(staging, ignore_errors=True)
+        fresh = VectorIndex(staging, enc.dim, enc.name)
+
+        query = db.query(UserGraph).filter(
+            UserGraph.username == username
+        ).order_by(UserGraph.id)
+
+        ids, vectors = [], []
+        for row in query.yield_per(batch_size):
+            vector = encode(row_terms(row))
+            if vector is not None:
+                ids.append(row.id)
+                vectors.append(vector)
+            if len(ids) >= batch_size:
+                fresh.add(ids, vectors)
+                ids, vectors = [], []
+        if ids:
+            fresh.add(ids, vectors)
+
+        for name in INDEX_FILES:
+            if (staging / name).exists():
+                os.replace(staging / name, path / name)
+            elif (path / name).exists():
+                (path / name).unlink()
+
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def rebuild(db, username=None, batch_size=1000):
+    from .database import UserGraph
+
+    if username is not None:
+        users = [username]
+    else:
+        users = [u for (u,) in db.query(UserGraph.username).distinct()]
+
+    for user in users:
+        _rebuild_user(db, user, batch_size)
+
+    with _indexes_lock:
+        _indexes.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the graph vector index")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Re-encode saved graphs into fresh indexes")
+    parser.add_argument("--train", action="store_true",
+                        help="Recluster an index for approximate search")
+    parser.add_argument("--user", help="Limit to this user's index")
+    args = parser.parse_args()
+
+    from .database import SessionLocal, UserGraph
+
+    with SessionLocal() as db:
+        if args.rebuild:
+            rebuild(db, args.user)
+            print("Vector index rebuilt")
+
+        if args.train:
+            if args.user:
+                users = [args.user]
+            else:
+                users = [u for (u,) in db.query(UserGraph.username).distinct()]
+            for user in users:
+                index_for(user).train()
+            print(f"Trained {len(users)} index(es)")
@@ -0,0 +1,103 @@
+"""Measure login throughput and its effect on the other endpoints.
+
+Runs the same /process-data + /my-graphs workload twice against a local
+server: once on its own and once alongside a burst of /login requests.
+
+Usage:
+    python -m benchmarks.bench_auth --app-users 4 --login-users 16 --duration 15
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+
+from .corpora import arxiv_corpus
+from .loadtest import (
+    PASSWORD, VirtualUser, run_users, spawn_server, summarize
+)
+from .stub_upstream import start_stub_server, stub_urls
+
+APP_TRACE = [
+    {"method": "POST", "endpoint": "/process-data", "auth": True, "weight": 2,
+     "body": {"source": "arxiv", "topic": "bench", "content": "{abstract}"}},
+    {"method": "GET", "endpoint": "/my-graphs", "auth": True, "weight": 1},
+]
+
+LOGIN_TRACE = [
+    {"method": "POST", "endpoint": "/login", "auth": False, "weight": 1,
+     "body": {"username": "{user}", "password": PASSWORD}},
+]
+
+
+def make_users(base_url, prefix, count, trace, abstracts):
+    users = [
+        VirtualUser(base_url, f"{prefix}-{i}", trace, abstracts, seed=i)
+        for i in range(count)
+    ]
+    for user in users:
+        user.setup()
+    return users
+
+
+def print_phase(name, summary):
+    print(f"\n== {name}: {summary['throughput']:.1f} req/s total")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"   {endpoint:<16} {stats['throughput']:7.1f} req/s  "
+              f"p50 {stats['p50_ms']:7.1f}  p95 {stats['p95_ms']:7.1f}  "
+              f"p99 {stats['p99_ms']:7.1f} ms  err {stats['error_rate']:.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--app-users", type=int, default=4)
+    parser.add_argument("--login-users", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--bcrypt-workers", type=int, default=2)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    abstracts = arxiv_corpus(20)
+    stub = start_stub_server(port=0)
+    env = dict(stub_urls(stub))
+    env["KNOWMAP_BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    env["KNOWMAP_BCRYPT_WORKERS"] = str(args.bcrypt_workers)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server, base_url = spawn_server(args.port, args.workers, env, workdir)
+
+        try:
+            app_users = make_users(
+                base_url, "app", args.app_users, APP_TRACE, abstracts
+            )
+            login_users = make_users(
+                base_url, "burst", args.login_users, LOGIN_TRACE, abstracts
+            )
+
+            baseline = summarize(*run_users(app_users, args.duration))
+            print_phase("app workload alone", baseline)
+
+            burst = summarize(*run_users(app_users + login_users, args.duration))
+            print_phase("app workload during login burst", burst)
+        finally:
+            server.terminate()
+            server.wait()
+            stub.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "config": vars(args),
+                "baseline": baseline,
+                "login_burst": burst,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
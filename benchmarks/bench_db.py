@@ -0,0 +1,184 @@
+"""Insert and read throughput of the graph store across worker processes.
+
+Each worker process opens its own engine, as a uvicorn worker would.
+Only rows of users named bench-* are written and deleted, so a shared
+database keeps its other data, but point --database-url at a scratch
+database anyway: the runs contend with whatever else is using it.
+
+Usage:
+    python -m benchmarks.bench_db --workers 1,2,4,8 --rows 500 --batch-size 1,25
+    python -m benchmarks.bench_db --database-url postgresql+psycopg2://localhost/knowmap_bench
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# backend.database opens and migrates KNOWMAP_DATABASE_URL (by default
+# ./knowmap.db) on import. This benchmark opens its own engines, so keep
+# that import, here and in the spawned workers, off any real database.
+os.environ["KNOWMAP_DATABASE_URL"] = "sqlite://"
+
+from backend.database import (  # noqa: E402
+    DomainBridgeEntity,
+    DomainLinkDaily,
+    DomainLinkSummary,
+    UserGraph,
+    init_db,
+    make_engine,
+    make_sessionmaker,
+    save_graphs,
+)
+
+BENCH_USERS = "bench-%"
+
+
+def synthetic_graph(size):
+    nodes = [{"id": f"entity-{i}"} for i in range(size)]
+    edges = [
+        {"source": f"entity-{i}", "target": f"entity-{(i * 7 + 1) % size}", "label": "relate"}
+        for i in range(size)
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def make_row(username, graph_blob):
+    return UserGraph(
+        username=username,
+        source="benchmark",
+        topic="benchmark",
+        entities_json="[]",
+        cross_links_json="[]",
+        graph_json=graph_blob,
+        created_at=str(datetime.utcnow())
+    )
+
+
+def worker(url, index, rows, batch_size, reads, graph_size, barrier, results):
+    engine = make_engine(url)
+    SessionLocal = make_sessionmaker(engine)
+    username = f"bench-{index}"
+    graph_blob = json.dumps(synthetic_graph(graph_size))
+
+    barrier.wait()
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        for offset in range(0, rows, batch_size):
+            count = min(batch_size, rows - offset)
+            save_graphs(db, [make_row(username, graph_blob) for _ in range(count)])
+    insert_seconds = time.perf_counter() - start
+
+    barrier.wait()
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        for _ in range(reads):
+            # Same query shape as /my-graphs
+            graphs = db.query(UserGraph).filter(
+                UserGraph.username == username
+            ).order_by(UserGraph.id.desc()).all()
+            for g in graphs:
+                json.loads(g.graph_json)
+    read_seconds = time.perf_counter() - start
+
+    engine.dispose()
+    results.put((insert_seconds, read_seconds))
+
+
+def delete_bench_rows(engine):
+    with make_sessionmaker(engine)() as db:
+        for model in (UserGraph, DomainLinkSummary, DomainLinkDaily, DomainBridgeEntity):
+            db.query(model).filter(
+                model.username.like(BENCH_USERS)
+            ).delete(synchronize_session=False)
+        db.commit()
+
+
+def run(url, workers, rows, batch_size, reads, graph_size):
+    engine = make_engine(url)
+    init_db(engine)
+    # Each run starts from no benchmark rows, so reads see exactly `rows`
+    delete_bench_rows(engine)
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+
+    processes = [
+        ctx.Process(
+            target=worker,
+            args=(url, i, rows, batch_size, reads, graph_size, barrier, results)
+        )
+        for i in range(workers)
+    ]
+    for p in processes:
+        p.start()
+
+    timings = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    delete_bench_rows(engine)
+    engine.dispose()
+
+    insert_wall = max(t[0] for t in timings)
+    read_wall = max(t[1] for t in timings)
+
+    return {
+        "workers": workers,
+        "batch_size": batch_size,
+        "rows_inserted": workers * rows,
+        "insert_rows_per_sec": workers * rows / insert_wall,
+        "read_queries_per_sec": workers * reads / read_wall if reads else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url",
+                        help="Defaults to a scratch SQLite file")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--batch-size", default="1,25",
+                        help="Rows per transaction; 1 matches /process-data")
+    parser.add_argument("--rows", type=int, default=500,
+                        help="Rows inserted per worker")
+    parser.add_argument("--reads", type=int, default=50,
+                        help="/my-graphs style queries per worker")
+    parser.add_argument("--graph-size", type=int, default=30,
+                        help="Nodes per synthetic graph")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+
+        for batch_size in (int(b) for b in args.batch_size.split(",")):
+            for workers in (int(w) for w in args.workers.split(",")):
+                result = run(
+                    url, workers, args.rows, batch_size,
+                    args.reads, args.graph_size
+                )
+                results.append(result)
+                print(f"workers {workers:>2}  batch {batch_size:>3}  "
+                      f"insert {result['insert_rows_per_sec']:9.1f} rows/s  "
+                      f"read {result['read_queries_per_sec']:8.1f} queries/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"database": url.split("://")[0], "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
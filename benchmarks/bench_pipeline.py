@@ -0,0 +1,376 @@
+"""End-to-end benchmark for the NLP-to-graph pipeline behind /process-data.
+
+Usage:
+    python -m benchmarks.bench_pipeline --docs 200 --output results.json
+    python -m benchmarks.bench_pipeline --compare baseline.json --threshold 0.1
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# backend.database opens and migrates KNOWMAP_DATABASE_URL (by default
+# ./knowmap.db) on import. Documents are committed to a scratch database
+# opened below, so keep that import, here and in the spawned per-corpus
+# processes, off any real database.
+os.environ["KNOWMAP_DATABASE_URL"] = "sqlite://"
+
+from backend.database import init_db, make_engine, make_sessionmaker  # noqa: E402
+from backend.main import make_graph_row, process_doc  # noqa: E402
+from backend.metrics import collect_spans, span  # noqa: E402
+from backend.nlp.preprocessing import preprocess_text  # noqa: E402
+from backend.nlp.pipeline import analyze_doc  # noqa: E402
+from backend.nlp.relation_extraction import extract_relation_tokens  # noqa: E402
+from backend.nlp.canonicalize import Canonicalizer, canonicalize_relations  # noqa: E402
+from backend.nlp.triples import build_triples  # noqa: E402
+from backend.nlp.graph_builder import build_graph, graph_to_json  # noqa: E402
+from backend.nlp.layout import compute_layout  # noqa: E402
+
+from .corpora import CORPORA, load_corpus
+from .stats import percentile
+
+# The span() stages of /process-data, in order
+STAGES = [
+    "preprocess", "ner", "relations", "canonicalize", "triples", "graph",
+    "layout", "cross_domain", "json_dump", "db_commit", "vector_index"
+]
+
+# ===============================
+# HELPERS
+# ===============================
+
+def peak_rss_mb():
+    # Lifetime peak of this process, so each corpus runs in its own process
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+
+    def record(self, spans):
+        for stage, seconds in spans.items():
+            self.samples.setdefault(stage, []).append(seconds * 1000)
+
+    def summary(self):
+        return {
+            stage: {
+                "mean_ms": sum(values) / len(values) if values else 0.0,
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "total_ms": sum(values),
+            }
+            for stage, values in self.samples.items()
+            if values
+        }
+
+# ===============================
+# PIPELINE RUN
+# ===============================
+
+def raw_relations(relation_tokens):
+    return [(s.text, v.lemma_, o.text) for s, v, o in relation_tokens]
+
+
+def process_document(content, timer, db=None, username="benchmark"):
+    # Runs the code behind /process-data and records its span() stages.
+    # Without a database it stops after building the row to commit.
+    with collect_spans() as spans:
+        with span("preprocess"):
+            doc = preprocess_text(content)
+
+        if db is None:
+            result = analyze_doc(doc)
+            with span("json_dump"):
+                make_graph_row(username, "benchmark", "benchmark", result)
+        else:
+            _, result, _ = process_doc(db, username, "benchmark", "benchmark", doc)
+
+    timer.record(spans)
+
+    # Untimed: the canonicalization report compares raw and merged names
+    return result["triples"], extract_relation_tokens(doc)
+
+
+def graph_scaling(triples_per_doc, sizes):
+    results = []
+
+    for size in sizes:
+        if size > len(triples_per_doc):
+            continue
+
+        triples = [t for doc in triples_per_doc[:size] for t in doc]
+
+        start = time.perf_counter()
+        graph = build_graph(triples)
+        graph_json = graph_to_json(graph)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        compute_layout(graph_json)
+        layout_ms = (time.perf_counter() - start) * 1000
+
+        results.append({
+            "docs": size,
+            "triples": len(triples),
+            "nodes": graph.number_of_nodes(),
+            "edges": graph.number_of_edges(),
+            "build_ms": build_ms,
+            "layout_ms": layout_ms,
+            "json_bytes": len(json.dumps(graph_json)),
+        })
+
+    return results
+
+
+def canonicalization_report(relation_tokens_per_doc):
+    # The same relations without and with corpus-wide canonicalization
+    canonicalizer = Canonicalizer()
+    raw_triples, canonical_triples = [], []
+
+    for relation_tokens in relation_tokens_per_doc:
+        raw_triples += build_triples(raw_relations(relation_tokens))
+        canonical_triples += build_triples(
+            canonicalize_relations(relation_tokens, canonicalizer)
+        )
+
+    raw = build_graph(raw_triples)
+    canonical = build_graph(canonical_triples)
+
+    raw_nodes = raw.number_of_nodes()
+    return {
+        "raw_nodes": raw_nodes,
+        "canonical_nodes": canonical.number_of_nodes(),
+        "raw_edges": raw.number_of_edges(),
+        "canonical_edges": canonical.number_of_edges(),
+        "node_reduction": (
+            1 - canonical.number_of_nodes() / raw_nodes if raw_nodes else 0.0
+        ),
+    }
+
+
+def bench_corpus(name, n_docs, warmup, scaling_sizes, db=None):
+    docs = load_corpus(name, n_docs)
+    # One user per corpus, so related-graph searches only see that corpus
+    username = f"bench-{name}"
+
+    for content in docs[:warmup]:
+        process_document(content, StageTimer(), db, username)
+
+    timer = StageTimer()
+    triples_per_doc = []
+    relation_tokens_per_doc = []
+
+    start = time.perf_counter()
+    for content in docs:
+        triples, relation_tokens = process_document(content, timer, db, username)
+        triples_per_doc.append(triples)
+        relation_tokens_per_doc.append(relation_tokens)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "docs": len(docs),
+        "total_seconds": elapsed,
+        "docs_per_sec": len(docs) / elapsed if elapsed else 0.0,
+        "stages": timer.summary(),
+        "peak_rss_mb": peak_rss_mb(),
+        "scaling": graph_scaling(triples_per_doc, scaling_sizes),
+        "canonicalization": canonicalization_report(relation_tokens_per_doc),
+    }
+
+
+def bench_corpus_isolated(name, n_docs, warmup, scaling_sizes, db_url=None):
+    engine = db = None
+    if db_url is not None:
+        engine = make_engine(db_url)
+        db = make_sessionmaker(engine)()
+
+    try:
+        return bench_corpus(name, n_docs, warmup, scaling_sizes, db)
+    finally:
+        if db is not None:
+            db.close()
+            engine.dispose()
+
+
+def run_benchmarks(corpora, n_docs, warmup, scaling_sizes, use_db=True):
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "docs": n_docs,
+            "warmup": warmup,
+        },
+        "corpora": {},
+    }
+
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = None
+        if use_db:
+            db_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+            engine = make_engine(db_url)
+            init_db(engine)
+            engine.dispose()
+
+        # Read by backend.vector_index when each corpus process imports it
+        os.environ["KNOWMAP_VECTOR_INDEX_DIR"] = str(Path(tmp) / "vector_index")
+
+        # A fresh process per corpus keeps peak RSS from carrying over
+        # from the corpora benchmarked before it
+        for name in corpora:
+            with ctx.Pool(1) as pool:
+                results["corpora"][name] = pool.apply(
+                    bench_corpus_isolated,
+                    (name, n_docs, warmup, scaling_sizes, db_url)
+                )
+
+    return results
+
+# ===============================
+# REGRESSION COMPARISON
+# ===============================
+
+def comparable_metrics(results, min_ms):
+    # (name, value, higher_is_better)
+    metrics = []
+
+    for corpus, data in results["corpora"].items():
+        metrics.append((f"{corpus}.docs_per_sec", data["docs_per_sec"], True))
+        metrics.append((f"{corpus}.peak_rss_mb", data["peak_rss_mb"], False))
+
+        for stage, stats in data["stages"].items():
+            # Sub-threshold stages are dominated by timer noise
+            if stats["p50_ms"] >= min_ms:
+                metrics.append((f"{corpus}.{stage}.p50_ms", stats["p50_ms"], False))
+
+    return metrics
+
+
+def compare_results(baseline, current, threshold, min_ms):
+    previous = {name: value for name, value, _ in comparable_metrics(baseline, min_ms)}
+    regressions = []
+    rows = []
+
+    for name, value, higher_is_better in comparable_metrics(current, min_ms):
+        if name not in previous or previous[name] == 0:
+            continue
+
+        change = (value - previous[name]) / previous[name]
+        worse = -change if higher_is_better else change
+        regressed = worse > threshold
+
+        rows.append((name, previous[name], value, change, regressed))
+        if regressed:
+            regressions.append(name)
+
+    return rows, regressions
+
+
+def print_summary(results):
+    for corpus, data in results["corpora"].items():
+        print(f"\n== {corpus}: {data['docs']} docs, "
+              f"{data['docs_per_sec']:.1f} docs/sec, "
+              f"peak RSS {data['peak_rss_mb']:.0f} MB")
+
+        for stage, stats in data["stages"].items():
+            print(f"   {stage:<14} p50 {stats['p50_ms']:8.3f} ms   "
+                  f"p95 {stats['p95_ms']:8.3f} ms")
+
+        report = data["canonicalization"]
+        print(f"   canonicalization: {report['raw_nodes']} -> "
+              f"{report['canonical_nodes']} nodes "
+              f"({report['node_reduction']:.1%} fewer)")
+
+        for point in data["scaling"]:
+            print(f"   scaling {point['docs']:>6} docs -> "
+                  f"{point['nodes']} nodes, {point['edges']} edges, "
+                  f"{point['build_ms']:.1f} ms, "
+                  f"layout {point['layout_ms']:.1f} ms")
+
+# ===============================
+# CLI
+# ===============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpora", default=",".join(CORPORA),
+                        help="Comma separated corpus names")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--scaling-sizes", default="10,100,1000")
+    parser.add_argument("--no-db", action="store_true",
+                        help="Skip the SQLite commit and vector index stages")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed relative slowdown before failing")
+    parser.add_argument("--min-ms", type=float, default=0.1,
+                        help="Ignore stages faster than this when comparing")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        corpora=[c.strip() for c in args.corpora.split(",") if c.strip()],
+        n_docs=args.docs,
+        warmup=args.warmup,
+        scaling_sizes=[int(s) for s in args.scaling_sizes.split(",") if s],
+        use_db=not args.no_db,
+    )
+
+    print_summary(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        rows, regressions = compare_results(
+            baseline, results, args.threshold, args.min_ms
+        )
+
+        print(f"\n== Comparison against {baseline['meta'].get('commit')}")
+        for name, old, new, change, regressed in rows:
+            flag = "REGRESSION" if regressed else ""
+            print(f"   {name:<40} {old:10.3f} -> {new:10.3f} ({change:+.1%}) {flag}")
+
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed beyond "
+                  f"{args.threshold:.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
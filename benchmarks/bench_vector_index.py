@@ -0,0 +1,128 @@
+"""Append throughput and query latency of the graph vector index.
+
+Vectors are synthetic clusters on the unit sphere, roughly how graphs on
+related topics spread out. Exhaustive search is the recall baseline for
+the IVF (approximate) search at each nprobe.
+
+Usage:
+    python -m benchmarks.bench_vector_index --vectors 1000000 --queries 200
+    python -m benchmarks.bench_vector_index --vectors 100000 --nprobe 4,16,64
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from backend.vector_index import HASH_DIM, VectorIndex
+
+from .stats import percentile
+
+
+def clustered_vectors(rng, centers, count, noise):
+    labels = rng.integers(0, len(centers), count)
+    vectors = centers[labels] + rng.normal(scale=noise, size=(count, centers.shape[1]))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def time_queries(index, queries, k, nprobe):
+    latencies = []
+    results = []
+
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, k=k, nprobe=nprobe)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({graph_id for graph_id, _ in hits})
+
+    return latencies, results
+
+
+def latency_summary(latencies):
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": sum(latencies) / len(latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=HASH_DIM)
+    parser.add_argument("--clusters", type=int, default=5000,
+                        help="Synthetic topic clusters")
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--batch", type=int, default=50000,
+                        help="Vectors per append while filling the index")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="4,16,64")
+    parser.add_argument("--lists", type=int, help="IVF clusters; default scales with size")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(args.clusters, args.dim))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, args.dim, "benchmark")
+
+        start = time.perf_counter()
+        for offset in range(0, args.vectors, args.batch):
+            count = min(args.batch, args.vectors - offset)
+            index.add(
+                np.arange(offset, offset + count),
+                clustered_vectors(rng, centers, count, args.noise),
+                # Timed separately below
+                auto_train=False
+            )
+        append_seconds = time.perf_counter() - start
+        print(f"appended {len(index)} vectors in {append_seconds:.1f} s "
+              f"({len(index) / append_seconds:,.0f} vectors/s)")
+
+        queries = clustered_vectors(rng, centers, args.queries, args.noise)
+
+        exact_latencies, exact = time_queries(index, queries, args.k, None)
+        exact_summary = latency_summary(exact_latencies)
+        print(f"exhaustive      p50 {exact_summary['p50_ms']:8.2f} ms  "
+              f"p95 {exact_summary['p95_ms']:8.2f} ms")
+
+        start = time.perf_counter()
+        index.train(args.lists)
+        train_seconds = time.perf_counter() - start
+        print(f"trained IVF in {train_seconds:.1f} s")
+
+        ivf = []
+        for nprobe in (int(p) for p in args.nprobe.split(",")):
+            latencies, approx = time_queries(index, queries, args.k, nprobe)
+            recall = sum(len(a & e) for a, e in zip(approx, exact)) / sum(
+                len(e) for e in exact
+            )
+            summary = dict(latency_summary(latencies), nprobe=nprobe, recall=recall)
+            ivf.append(summary)
+            print(f"ivf nprobe {nprobe:>4} p50 {summary['p50_ms']:8.2f} ms  "
+                  f"p95 {summary['p95_ms']:8.2f} ms  recall@{args.k} {recall:.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "vectors": args.vectors,
+                "dim": args.dim,
+                "append_vectors_per_sec": args.vectors / append_seconds,
+                "train_seconds": train_seconds,
+                "exhaustive": exact_summary,
+                "ivf": ivf,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import csv
+import json
+import random
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CORPUS_DIR = Path(__file__).resolve().parent / "corpora"
+
+CARDIO_CSV = ROOT / "dataset" / "cardio_train.csv"
+ARXIV_ABSTRACTS = CORPUS_DIR / "arxiv_abstracts.jsonl"
+
+# ===============================
+# CARDIO SENTENCES
+# ===============================
+
+def cardio_row_to_text(row):
+    age_years = float(row["age"]) / 365
+
+    return (
+        f"Patient has age {round(age_years, 1)} years. "
+        f"Patient has systolic pressure {row['ap_hi']} mmHg. "
+        f"Patient has diastolic pressure {row['ap_lo']} mmHg. "
+        f"Patient has cholesterol level {row['cholesterol']}. "
+        f"Patient has glucose level {row['gluc']}. "
+        f"Patient has cardio status {row['cardio']}."
+    )
+
+
+def cardio_corpus(n_docs):
+    docs = []
+
+    with open(CARDIO_CSV, newline="") as f:
+        for row in csv.DictReader(f, delimiter=";"):
+            docs.append(cardio_row_to_text(row))
+            if len(docs) >= n_docs:
+                break
+
+    return docs
+
+
+def synthetic_cardio_corpus(n_docs, seed=0):
+    rng = random.Random(seed)
+    docs = []
+
+    for _ in range(n_docs):
+        row = {
+            "age": rng.randint(30 * 365, 65 * 365),
+            "ap_hi": rng.randint(90, 180),
+            "ap_lo": rng.randint(60, 110),
+            "cholesterol": rng.randint(1, 3),
+            "gluc": rng.randint(1, 3),
+            "cardio": rng.randint(0, 1),
+        }
+        docs.append(cardio_row_to_text(row))
+
+    return docs
+
+# ===============================
+# ARXIV-LIKE ABSTRACTS
+# ===============================
+
+def arxiv_corpus(n_docs):
+    with open(ARXIV_ABSTRACTS) as f:
+        abstracts = [json.loads(line)["summary"] for line in f if line.strip()]
+
+    # Repeat the stored abstracts to reach the requested size
+    return [abstracts[i % len(abstracts)] for i in range(n_docs)]
+
+
+SUBJECTS = [
+    "AI", "The algorithm", "Machine learning", "The hospital",
+    "The market", "Climate policy", "The neural network", "Investment",
+    "The treatment", "Carbon pricing", "The software", "The economy"
+]
+
+VERBS = ["improves", "reduces", "predicts", "drives", "supports", "affects"]
+
+OBJECTS = [
+    "disease", "temperature", "finance", "healthcare", "carbon emissions",
+    "medical outcomes", "global warming", "market prices", "treatment costs",
+    "software quality", "climate risk", "investment returns"
+]
+
+
+def synthetic_abstract_corpus(n_docs, sentences_per_doc=5, seed=0):
+    rng = random.Random(seed)
+    docs = []
+
+    for _ in range(n_docs):
+        sentences = [
+            f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}."
+            for _ in range(sentences_per_doc)
+        ]
+        docs.append(" ".join(sentences))
+
+    return docs
+
+
+CORPORA = {
+    "cardio": cardio_corpus,
+    "synthetic_cardio": synthetic_cardio_corpus,
+    "arxiv": arxiv_corpus,
+    "synthetic_abstracts": synthetic_abstract_corpus,
+}
+
+
+def load_corpus(name, n_docs):
+    if name not in CORPORA:
+        raise ValueError(f"Unknown corpus: {name}")
+    return CORPORA[name](n_docs)
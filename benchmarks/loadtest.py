@@ -0,0 +1,339 @@
+"""Replay a JSON-lines request trace against the API at increasing concurrency.
+
+Usage:
+    python -m benchmarks.loadtest --spawn-server --levels 1,2,4,8,16 --duration 20
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --output load.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+from .corpora import ROOT, arxiv_corpus
+from .stats import percentile
+from .stub_upstream import start_stub_server, stub_urls
+
+DEFAULT_TRACE = Path(__file__).resolve().parent / "traces" / "mixed.jsonl"
+PASSWORD = "LoadTest1!"
+
+# ===============================
+# TRACE HANDLING
+# ===============================
+
+def load_trace(path):
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    for entry in entries:
+        entry.setdefault("method", "GET")
+        entry.setdefault("weight", 1)
+        entry.setdefault("auth", False)
+
+    return entries
+
+
+def substitute(value, variables):
+    if isinstance(value, str):
+        for name, replacement in variables.items():
+            value = value.replace("{" + name + "}", str(replacement))
+        return value
+    if isinstance(value, list):
+        return [substitute(v, variables) for v in value]
+    if isinstance(value, dict):
+        return {k: substitute(v, variables) for k, v in value.items()}
+    return value
+
+# ===============================
+# VIRTUAL USERS
+# ===============================
+
+class VirtualUser:
+
+    _seq = 0
+    _seq_lock = threading.Lock()
+
+    def __init__(self, base_url, name, trace, abstracts, seed):
+        self.base_url = base_url.rstrip("/")
+        self.name = name
+        self.trace = trace
+        self.weights = [e["weight"] for e in trace]
+        self.abstracts = abstracts
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+        self.token = None
+        self.graph_id = None
+
+    @classmethod
+    def next_seq(cls):
+        with cls._seq_lock:
+            cls._seq += 1
+            return cls._seq
+
+    def setup(self):
+        self.session.post(f"{self.base_url}/register", json={
+            "username": self.name,
+            "email": f"{self.name}@loadtest.example.com",
+            "password": PASSWORD,
+            "interests": ["AI"],
+        })
+        response = self.session.post(f"{self.base_url}/login", json={
+            "username": self.name, "password": PASSWORD
+        })
+        response.raise_for_status()
+        self.token = response.json()["access_token"]
+
+    def request(self, entry):
+        variables = {
+            "user": self.name,
+            "password": PASSWORD,
+            "seq": self.next_seq(),
+            "abstract": self.rng.choice(self.abstracts),
+        }
+
+        path = entry["endpoint"]
+        if "{graph_id}" in path:
+            if self.graph_id is None:
+                return None
+            path = path.replace("{graph_id}", str(self.graph_id))
+
+        headers = {}
+        if entry["auth"]:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        body = substitute(entry.get("body"), variables)
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                entry["method"], self.base_url + path,
+                json=body, headers=headers, timeout=60
+            )
+            ok = response.status_code < 400
+            status = response.status_code
+        except requests.RequestException:
+            ok, status, response = False, 0, None
+        latency = time.perf_counter() - start
+
+        if ok and entry["endpoint"] == "/process-data":
+            self.graph_id = response.json().get("graph_id", self.graph_id)
+
+        return entry["endpoint"], latency, ok, status
+
+    def run_until(self, deadline, samples):
+        while time.perf_counter() < deadline:
+            entry = self.rng.choices(self.trace, weights=self.weights)[0]
+            sample = self.request(entry)
+            if sample is not None:
+                samples.append(sample)
+
+# ===============================
+# LOAD LEVELS
+# ===============================
+
+def summarize(samples, elapsed):
+    by_endpoint = {}
+    for endpoint, latency, ok, status in samples:
+        by_endpoint.setdefault(endpoint, []).append((latency, ok))
+
+    endpoints = {}
+    for endpoint, values in sorted(by_endpoint.items()):
+        latencies = [latency * 1000 for latency, _ in values]
+        errors = sum(1 for _, ok in values if not ok)
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "throughput": len(values) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "error_rate": errors / len(values),
+        }
+
+    errors = sum(1 for *_, ok, _ in samples if not ok)
+    return {
+        "requests": len(samples),
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def run_users(users, duration):
+    samples = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+
+    threads = [
+        threading.Thread(target=user.run_until, args=(deadline, samples))
+        for user in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return samples, time.perf_counter() - start
+
+
+def run_level(base_url, trace, abstracts, concurrency, duration, level_index):
+    users = [
+        VirtualUser(
+            base_url, f"load-{level_index}-{i}", trace, abstracts,
+            seed=level_index * 1000 + i
+        )
+        for i in range(concurrency)
+    ]
+    for user in users:
+        user.setup()
+
+    result = summarize(*run_users(users, duration))
+    result["concurrency"] = concurrency
+    return result
+
+
+def find_saturation(levels, min_gain, max_error_rate):
+    best = None
+
+    for level in levels:
+        if level["error_rate"] > max_error_rate:
+            return {
+                "concurrency": best["concurrency"] if best else level["concurrency"],
+                "reason": f"error rate {level['error_rate']:.1%} at "
+                          f"concurrency {level['concurrency']}",
+            }
+
+        if best and level["throughput"] < best["throughput"] * (1 + min_gain):
+            return {
+                "concurrency": best["concurrency"],
+                "reason": f"throughput gain below {min_gain:.0%} at "
+                          f"concurrency {level['concurrency']}",
+            }
+
+        best = level
+
+    return {"concurrency": None, "reason": "not reached at tested levels"}
+
+# ===============================
+# SERVER MANAGEMENT
+# ===============================
+
+def spawn_server(port, workers, extra_env, workdir):
+    env = dict(os.environ)
+    env.update(extra_env)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+
+    # Run from a scratch directory so the default SQLite file stays isolated
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            requests.get(f"{base_url}/metrics", timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.5)
+
+    process.terminate()
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+def print_level(level):
+    print(f"\n== concurrency {level['concurrency']}: "
+          f"{level['throughput']:.1f} req/s, "
+          f"errors {level['error_rate']:.2%}")
+
+    for endpoint, stats in level["endpoints"].items():
+        print(f"   {endpoint:<20} {stats['throughput']:7.1f} req/s  "
+              f"p50 {stats['p50_ms']:7.1f}  p95 {stats['p95_ms']:7.1f}  "
+              f"p99 {stats['p99_ms']:7.1f} ms  err {stats['error_rate']:.1%}")
+
+# ===============================
+# CLI
+# ===============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", default=str(DEFAULT_TRACE))
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn-server", action="store_true",
+                        help="Start uvicorn and the stub upstream locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--stub-delay-ms", type=float, default=50,
+                        help="Simulated upstream latency for the stub")
+    parser.add_argument("--levels", default="1,2,4,8,16,32")
+    parser.add_argument("--duration", type=float, default=15,
+                        help="Seconds to run each concurrency level")
+    parser.add_argument("--min-gain", type=float, default=0.10)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    trace = load_trace(args.trace)
+    abstracts = arxiv_corpus(20)
+
+    server = stub = None
+    base_url = args.base_url
+
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.spawn_server:
+                stub = start_stub_server(port=0, delay_ms=args.stub_delay_ms)
+                server, base_url = spawn_server(
+                    args.port, args.workers, stub_urls(stub), workdir
+                )
+
+            levels = []
+            for index, concurrency in enumerate(int(c) for c in args.levels.split(",")):
+                level = run_level(
+                    base_url, trace, abstracts, concurrency, args.duration, index
+                )
+                print_level(level)
+                levels.append(level)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+            if stub is not None:
+                stub.shutdown()
+
+    saturation = find_saturation(levels, args.min_gain, args.max_error_rate)
+    print(f"\nSaturation: concurrency {saturation['concurrency']} "
+          f"({saturation['reason']})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "trace": args.trace,
+                    "workers": args.workers,
+                    "duration": args.duration,
+                },
+                "levels": levels,
+                "saturation": saturation,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Local stand-in for the Wikipedia and arXiv APIs used by /fetch-external.
+
+Point the service at it with:
+    KNOWMAP_WIKIPEDIA_URL=http://127.0.0.1:8900/wikipedia
+    KNOWMAP_ARXIV_URL=http://127.0.0.1:8900/arxiv
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+from .corpora import ARXIV_ABSTRACTS
+
+ATOM_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<feed xmlns="http://www.w3.org/2005/Atom" '
+    'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">\n'
+)
+
+
+def load_abstracts():
+    with open(ARXIV_ABSTRACTS) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    abstracts = []
+    delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+
+        parsed = urllib.parse.urlparse(self.path)
+
+        if parsed.path.startswith("/wikipedia/page/summary/"):
+            topic = urllib.parse.unquote(parsed.path.rsplit("/", 1)[-1])
+            self._wikipedia(topic)
+        elif parsed.path == "/arxiv/query":
+            self._arxiv(urllib.parse.parse_qs(parsed.query))
+        else:
+            self._send(404, json.dumps({"detail": "Not found"}), "application/json")
+
+    def _wikipedia(self, topic):
+        # Deterministic pick so the same topic always returns the same page
+        abstract = self.abstracts[sum(map(ord, topic)) % len(self.abstracts)]
+        body = {"title": topic, "extract": abstract["summary"]}
+        self._send(200, json.dumps(body), "application/json")
+
+    def _arxiv(self, params):
+        start = int(params.get("start", ["0"])[0])
+        max_results = int(params.get("max_results", ["10"])[0])
+        entries = self.abstracts[start:start + max_results]
+
+        parts = [
+            ATOM_HEADER,
+            f"<opensearch:totalResults>{len(self.abstracts)}</opensearch:totalResults>\n",
+        ]
+        for entry in entries:
+            parts.append(
+                "<entry>"
+                f"<id>http://arxiv.org/abs/{escape(entry['id'])}</id>"
+                f"<title>{escape(entry['title'])}</title>"
+                f"<summary>{escape(entry['summary'])}</summary>"
+                "</entry>\n"
+            )
+        parts.append("</feed>\n")
+
+        self._send(200, "".join(parts), "application/atom+xml")
+
+
+def start_stub_server(host="127.0.0.1", port=8900, delay_ms=0):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "abstracts": load_abstracts(),
+        "delay": delay_ms / 1000,
+    })
+
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def stub_urls(server):
+    host, port = server.server_address[:2]
+    base = f"http://{host}:{port}"
+    return {
+        "KNOWMAP_WIKIPEDIA_URL": f"{base}/wikipedia",
+        "KNOWMAP_ARXIV_URL": f"{base}/arxiv",
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Wikipedia/arXiv upstream")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--delay-ms", type=float, default=0,
+                        help="Artificial latency added to every response")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.host, args.port, args.delay_ms)
+    for name, url in stub_urls(server).items():
+        print(f"{name}={url}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
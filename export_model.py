@@ -0,0 +1,278 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+# ==============================
+# Compact model format
+# ==============================
+#
+# A compact model is a directory holding a meta.json file plus one
+# uncompressed .npy file per array. Arrays are opened with mmap_mode="r",
+# so loading is near instant and several API workers loading the same
+# model share the pages through the OS page cache.
+
+FORMAT_VERSION = 1
+
+
+def _save_arrays(out_dir, arrays):
+    for name, array in arrays.items():
+        np.save(out_dir / f"{name}.npy", np.ascontiguousarray(array))
+
+
+def _export_logistic(model):
+    arrays = {
+        "coef": model.coef_.astype(np.float64),
+        "intercept": np.asarray(model.intercept_, dtype=np.float64),
+    }
+    return "logistic_regression", arrays
+
+
+def _export_forest(model):
+    if model.n_outputs_ != 1:
+        raise ValueError("Only single-output random forests can be exported")
+
+    n_classes = len(model.classes_)
+    children_left, children_right = [], []
+    features, thresholds, missing_left, values = [], [], [], []
+    roots = []
+    offset = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        left = np.where(left == -1, -1, left + offset)
+        right = np.where(right == -1, -1, right + offset)
+
+        # Store leaf class probabilities, normalised the same way
+        # DecisionTreeClassifier.predict_proba does at predict time.
+        value = tree.value[:, 0, :n_classes].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        value = value / normalizer
+
+        missing = getattr(tree, "missing_go_to_left", None)
+        if missing is None:
+            missing = np.ones(tree.node_count, dtype=np.bool_)
+
+        roots.append(offset)
+        children_left.append(left)
+        children_right.append(right)
+        features.append(tree.feature.astype(np.int64))
+        thresholds.append(tree.threshold.astype(np.float64))
+        missing_left.append(np.asarray(missing, dtype=np.bool_))
+        values.append(value)
+
+        offset += tree.node_count
+
+    arrays = {
+        "roots": np.asarray(roots, dtype=np.int64),
+        "children_left": np.concatenate(children_left),
+        "children_right": np.concatenate(children_right),
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "missing_go_to_left": np.concatenate(missing_left),
+        "value": np.concatenate(values),
+    }
+    return "random_forest", arrays
+
+
+def export_compact_model(model, out_dir):
+    out_dir = Path(out_dir)
+
+    if isinstance(model, RandomForestClassifier):
+        kind, arrays = _export_forest(model)
+    elif isinstance(model, LogisticRegression):
+        kind, arrays = _export_logistic(model)
+    else:
+        raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    _save_arrays(out_dir, arrays)
+
+    feature_names = getattr(model, "feature_names_in_", None)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "kind": kind,
+        "classes": np.asarray(model.classes_).tolist(),
+        "n_features": int(model.n_features_in_),
+        "feature_names": None if feature_names is None else list(feature_names),
+        "arrays": sorted(arrays),
+    }
+
+    with open(out_dir / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return out_dir
+
+# ==============================
+# Compact model loaders
+# ==============================
+
+class _CompactModel:
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self.classes_ = np.asarray(meta["classes"])
+        self.n_features_in_ = meta["n_features"]
+        self.feature_names = meta["feature_names"]
+
+    def _prepare(self, X):
+        if self.feature_names is not None and hasattr(X, "columns"):
+            X = X[self.feature_names]
+
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected input with {self.n_features_in_} features"
+            )
+        return X
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.classes_.take(np.argmax(proba, axis=1), axis=0)
+
+
+class CompactLogisticRegression(_CompactModel):
+
+    def decision_function(self, X):
+        X = self._prepare(X)
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+
+        scores = X @ self.arrays["coef"].T + self.arrays["intercept"]
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+
+        if scores.ndim == 1:
+            prob = 1.0 / (1.0 + np.exp(-scores))
+            return np.vstack([1 - prob, prob]).T
+
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+
+        if scores.ndim == 1:
+            return self.classes_.take((scores > 0).astype(int), axis=0)
+
+        return self.classes_.take(np.argmax(scores, axis=1), axis=0)
+
+
+class CompactRandomForest(_CompactModel):
+
+    chunk_size = 4096
+
+    def _leaves(self, X):
+        a = self.arrays
+        n_samples = X.shape[0]
+
+        node = np.repeat(a["roots"][:, np.newaxis], n_samples, axis=1)
+        rows = np.arange(n_samples)[np.newaxis, :]
+
+        # Walk every tree for every sample in lockstep until all reach a leaf.
+        while True:
+            left = a["children_left"][node]
+            active = left != -1
+            if not active.any():
+                return node
+
+            x = X[rows, a["feature"][node]]
+            go_left = np.where(
+                np.isnan(x),
+                a["missing_go_to_left"][node],
+                x <= a["threshold"][node]
+            )
+            step = np.where(go_left, left, a["children_right"][node])
+            node = np.where(active, step, node)
+
+    def predict_proba(self, X):
+        # Trees split on float32 features, exactly like scikit-learn.
+        X = self._prepare(X).astype(np.float32)
+        value = self.arrays["value"]
+        n_trees = len(self.arrays["roots"])
+
+        proba = np.zeros((X.shape[0], value.shape[1]), dtype=np.float64)
+
+        for start in range(0, X.shape[0], self.chunk_size):
+            chunk = X[start:start + self.chunk_size]
+            leaves = self._leaves(chunk)
+
+            out = proba[start:start + len(chunk)]
+            for t in range(n_trees):
+                out += value[leaves[t]]
+
+        proba /= n_trees
+        return proba
+
+
+LOADERS = {
+    "logistic_regression": CompactLogisticRegression,
+    "random_forest": CompactRandomForest,
+}
+
+
+def load_compact_model(model_dir, mmap=True):
+    model_dir = Path(model_dir)
+
+    with open(model_dir / "meta.json") as f:
+        meta = json.load(f)
+
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model format in {model_dir}")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(model_dir / f"{name}.npy", mmap_mode=mmap_mode)
+        for name in meta["arrays"]
+    }
+
+    return LOADERS[meta["kind"]](meta, arrays)
+
+
+def verify_compact_model(model, compact, X):
+    expected = model.predict_proba(X)
+    actual = compact.predict_proba(X)
+
+    same_labels = np.array_equal(model.predict(X), compact.predict(X))
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+
+    return same_labels and max_diff <= 1e-9, max_diff
+
+# ==============================
+# CLI
+# ==============================
+
+if __name__ == "__main__":
+    import joblib
+    import pandas as pd
+
+    if len(sys.argv) != 3:
+        print("Usage: python export_model.py <model.pkl> <output_dir>")
+        sys.exit(1)
+
+    model_path, out_dir = sys.argv[1], sys.argv[2]
+
+    model = joblib.load(model_path)
+    export_compact_model(model, out_dir)
+    print(f"Compact model written to {out_dir}")
+
+    data_path = Path("dataset/cardio_train_processed.csv")
+    if data_path.exists():
+        X = pd.read_csv(data_path).drop("cardio", axis=1)
+        ok, max_diff = verify_compact_model(model, load_compact_model(out_dir), X)
+        print(f"Predictions identical: {ok} (max proba diff {max_diff:.2e})")
+        if not ok:
+            sys.exit(1)
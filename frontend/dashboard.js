@@ -8,6 +8,8 @@ const graphSelect = document.getElementById("savedGraphsDropdown");
 const loadBtn = document.getElementById("loadGraphsBtn");
 const entitiesBox = document.getElementById("entitiesBox");
 const crossLinksBox = document.getElementById("crossLinksBox");
+const domainSummaryBox = document.getElementById("domainSummaryBox");
+const loadSummaryBtn = document.getElementById("loadSummaryBtn");
 const canvas = document.getElementById("graphCanvas");
 const ctx = canvas.getContext("2d");
 
@@ -64,7 +66,7 @@ graphSelect.addEventListener("change", async function () {
 
         displayEntities(data.entities);
         displayCrossLinks(data.cross_domain_links);
-        drawGraph(data.graph);
+        drawGraph(data.graph, data.layout);
 
     } catch (error) {
         console.error("Error loading graph:", error);
@@ -99,10 +101,75 @@ function displayCrossLinks(links) {
     });
 }
 
+// ===============================
+// CROSS-DOMAIN SUMMARY
+// ===============================
+loadSummaryBtn.addEventListener("click", loadDomainSummary);
+
+async function loadDomainSummary() {
+    try {
+        const response = await fetch("/cross-domain-summary", {
+            headers: {
+                "Authorization": "Bearer " + token
+            }
+        });
+
+        const summary = await response.json();
+
+        displayDomainSummary(summary);
+
+    } catch (error) {
+        console.error("Failed to load summary:", error);
+    }
+}
+
+function displayDomainSummary(summary) {
+
+    domainSummaryBox.innerHTML = "";
+
+    if (!summary.matrix.length) {
+        domainSummaryBox.textContent = "No cross-domain links yet.";
+        return;
+    }
+
+    summary.matrix.forEach(pair => {
+        const div = document.createElement("div");
+        div.textContent = `${pair.subject_domain} → ${pair.object_domain}: ` +
+            `${pair.links} links in ${pair.graphs} graphs`;
+        domainSummaryBox.appendChild(div);
+    });
+
+    const bridgesTitle = document.createElement("h4");
+    bridgesTitle.textContent = "Top bridging entities";
+    domainSummaryBox.appendChild(bridgesTitle);
+
+    summary.top_bridges.forEach(bridge => {
+        const div = document.createElement("div");
+        div.textContent = `${bridge.entity} (${bridge.subject_domain} → ` +
+            `${bridge.object_domain}): ${bridge.links}`;
+        domainSummaryBox.appendChild(div);
+    });
+
+    const trendTitle = document.createElement("h4");
+    trendTitle.textContent = "Links per day";
+    domainSummaryBox.appendChild(trendTitle);
+
+    const perDay = {};
+    summary.trend.forEach(point => {
+        perDay[point.day] = (perDay[point.day] || 0) + point.links;
+    });
+
+    Object.keys(perDay).forEach(day => {
+        const div = document.createElement("div");
+        div.textContent = `${day}: ${perDay[day]}`;
+        domainSummaryBox.appendChild(div);
+    });
+}
+
 // ===============================
 // DRAW GRAPH
 // ===============================
-function drawGraph(graph) {
+function drawGraph(graph, layout) {
 
     ctx.clearRect(0, 0, canvas.width, canvas.height);
 
@@ -112,7 +179,13 @@ function drawGraph(graph) {
     const positions = {};
 
     nodes.forEach(node => {
-        positions[node.id] = {
+        // Coordinates are precomputed by the server in the unit square
+        const point = layout && layout[node.id];
+
+        positions[node.id] = point ? {
+            x: point[0] * 700 + 100,
+            y: point[1] * 500 + 50
+        } : {
             x: Math.random() * 700 + 100,
             y: Math.random() * 500 + 50
         };
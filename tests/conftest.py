@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# backend.database connects at import time; keep the suite off ./knowmap.db
+# and ./vector_index
+os.environ.setdefault("KNOWMAP_DATABASE_URL", "sqlite://")
+os.environ.setdefault("KNOWMAP_VECTOR_INDEX_DIR", tempfile.mkdtemp(prefix="knowmap-index-"))
+# The default encoder loads the spaCy model to look for word vectors
+os.environ.setdefault("KNOWMAP_VECTOR_ENCODER", "hash")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def session():
+    # A private in-memory database per test
+    from backend.database import init_db, make_engine, make_sessionmaker
+
+    engine = make_engine("sqlite://")
+    init_db(engine)
+    with make_sessionmaker(engine)() as db:
+        yield db
+    engine.dispose()
+
+
+@pytest.fixture
+def make_graph():
+    # Unsaved UserGraph rows; keyword arguments override the defaults
+    from backend.database import UserGraph
+
+    def make(**overrides):
+        fields = {
+            "username": "alice",
+            "source": "wikipedia",
+            "topic": "topic",
+            "entities_json": "[]",
+            "cross_links_json": "[]",
+            "graph_json": '{"nodes": [], "edges": []}',
+            "created_at": "2026-01-01 00:00:00",
+        }
+        fields.update(overrides)
+        return UserGraph(**fields)
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def parsed():
+    # Hand-annotated Docs, so tests do not depend on a trained model.
+    # annotated is "word/POS/dep/lemma" per token; heads are token indices
+    spacy = pytest.importorskip("spacy")
+    from spacy.tokens import Doc
+
+    nlp = spacy.blank("en")
+
+    def parse(annotated, heads):
+        words, pos, deps, lemmas = zip(*(t.split("/") for t in annotated.split()))
+        return Doc(nlp.vocab, words=list(words), pos=list(pos), deps=list(deps),
+                   heads=heads, lemmas=list(lemmas))
+
+    return parse
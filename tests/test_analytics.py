@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from backend import analytics
+from backend.analytics import cross_domain_summary
+from backend.database import DomainLinkSummary, save_graphs
+
+LINKS = json.dumps([{
+    "subject": "AI", "subject_domain": "technology",
+    "object": "hospital", "object_domain": "healthcare",
+}])
+
+
+@pytest.fixture(params=["upsert", "fallback"])
+def dialect(request, monkeypatch):
+    # The fallback path is what dialects without ON CONFLICT use
+    if request.param == "fallback":
+        monkeypatch.setattr(analytics, "_dialect_insert", lambda db: None)
+    return request.param
+
+
+def test_summary_counts_accumulate(session, dialect, make_graph):
+    save_graphs(session, [make_graph(cross_links_json=LINKS, created_at="2026-01-01 00:00:00")])
+    save_graphs(session, [make_graph(cross_links_json=LINKS, created_at="2026-01-02 00:00:00")])
+
+    [row] = cross_domain_summary(session, "alice", days=100000)["matrix"]
+
+    assert row["links"] == 2
+    assert row["graphs"] == 2
+    assert row["first_seen"] == "2026-01-01 00:00:00"
+    assert row["last_seen"] == "2026-01-02 00:00:00"
+
+
+def test_last_seen_never_moves_backwards(session, dialect, make_graph):
+    # A graph created earlier but committed later must not rewind
+    # last_seen, and must still move first_seen back
+    save_graphs(session, [make_graph(cross_links_json=LINKS, created_at="2026-03-01 00:00:00")])
+    save_graphs(session, [make_graph(cross_links_json=LINKS, created_at="2026-02-01 00:00:00")])
+
+    summary = session.query(DomainLinkSummary).one()
+
+    assert summary.last_seen == "2026-03-01 00:00:00"
+    assert summary.first_seen == "2026-02-01 00:00:00"
+    assert summary.graph_count == 2
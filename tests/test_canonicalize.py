@@ -0,0 +1,65 @@
+from backend.nlp.canonicalize import Canonicalizer, canonicalize_relations
+
+
+def test_subject_pronoun_resolves_to_previous_subject(parsed):
+    doc = parsed(
+        "AI/PROPN/nsubj/AI helps/VERB/ROOT/help hospitals/NOUN/dobj/hospital "
+        "./PUNCT/punct/. It/PRON/nsubj/it improves/VERB/ROOT/improve "
+        "treatment/NOUN/dobj/treatment ./PUNCT/punct/.",
+        [1, 1, 1, 1, 5, 5, 5, 5],
+    )
+
+    relations = canonicalize_relations([(doc[4], doc[5], doc[6])])
+
+    assert relations == [("AI", "improve", "treatment")]
+
+
+def test_object_pronoun_skips_subject_of_its_own_verb(parsed):
+    doc = parsed(
+        "Doctors/NOUN/nsubj/doctor trust/VERB/ROOT/trust data/NOUN/dobj/datum "
+        "./PUNCT/punct/. AI/PROPN/nsubj/AI improves/VERB/ROOT/improve "
+        "it/PRON/dobj/it ./PUNCT/punct/.",
+        [1, 1, 1, 1, 5, 5, 5, 5],
+    )
+
+    relations = canonicalize_relations([(doc[4], doc[5], doc[6])])
+
+    assert relations == [("AI", "improve", "data")]
+
+
+def test_object_pronoun_prefers_nearest_argument(parsed):
+    # "Researchers trained the model and evaluated it"
+    doc = parsed(
+        "Researchers/NOUN/nsubj/researcher trained/VERB/ROOT/train "
+        "the/DET/det/the model/NOUN/dobj/model and/CCONJ/cc/and "
+        "evaluated/VERB/conj/evaluate it/PRON/dobj/it",
+        [1, 1, 3, 1, 1, 1, 5],
+    )
+
+    relations = canonicalize_relations([(doc[0], doc[5], doc[6])])
+
+    assert relations == [("Researchers", "evaluate", "model")]
+
+
+def test_pronoun_never_resolves_to_the_other_argument(parsed):
+    doc = parsed(
+        "Hospitals/NOUN/nsubj/hospital adopt/VERB/ROOT/adopt AI/PROPN/dobj/AI "
+        "./PUNCT/punct/. It/PRON/nsubj/it helps/VERB/ROOT/help "
+        "hospitals/NOUN/dobj/hospital ./PUNCT/punct/.",
+        [1, 1, 1, 1, 5, 5, 5, 5],
+    )
+
+    relations = canonicalize_relations([(doc[4], doc[5], doc[6])])
+
+    assert relations == [("AI", "help", "hospitals")]
+
+
+def test_self_loops_are_dropped(parsed):
+    # Both ends are aliases of one ontology entity
+    doc = parsed(
+        "AI/PROPN/nsubj/AI is/VERB/ROOT/be AI/PROPN/attr/AI",
+        [1, 1, 1],
+    )
+    canonicalizer = Canonicalizer()
+
+    assert canonicalize_relations([(doc[0], doc[1], doc[2])], canonicalizer) == []
@@ -0,0 +1,134 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from backend import database
+from backend.database import (
+    UserGraph,
+    init_db,
+    make_engine,
+    save_graphs,
+)
+from backend.metrics import DB_QUERY_SECONDS
+
+
+def _select_count():
+    series = DB_QUERY_SECONDS._series.get(("SELECT",))
+    return series[2] if series else 0
+
+# =========================
+# make_engine
+# =========================
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+def test_memory_sqlite_shares_one_database(url):
+    engine = make_engine(url)
+    assert isinstance(engine.pool, StaticPool)
+
+    init_db(engine)
+    with engine.connect() as conn:
+        assert "user_graphs" in inspect(conn).get_table_names()
+
+
+def test_memory_sqlite_is_instrumented():
+    engine = make_engine("sqlite://")
+    before = _select_count()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert _select_count() == before + 1
+
+
+def test_file_sqlite_uses_wal(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'knowmap.db'}")
+    before = _select_count()
+
+    with engine.connect() as conn:
+        mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        conn.execute(text("SELECT 1"))
+
+    assert mode == "wal"
+    assert _select_count() == before + 1
+    engine.dispose()
+
+
+def test_other_backends_get_a_tuned_queue_pool(monkeypatch):
+    calls = []
+
+    def fake_create_engine(url, **kwargs):
+        # No server driver is installed here; record the call and hand
+        # back a working engine so instrumentation can attach
+        calls.append((url, kwargs))
+        return create_engine("sqlite://")
+
+    monkeypatch.setattr(database, "create_engine", fake_create_engine)
+    make_engine("postgresql+psycopg2://knowmap@localhost/knowmap")
+
+    url, kwargs = calls[0]
+    assert url.startswith("postgresql")
+    assert kwargs["pool_size"] == database.DB_POOL_SIZE
+    assert kwargs["max_overflow"] == database.DB_MAX_OVERFLOW
+    assert kwargs["pool_pre_ping"] is True
+
+
+def test_file_sqlite_pool_is_not_static(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'knowmap.db'}")
+    assert not isinstance(engine.pool, StaticPool)
+    assert isinstance(engine.pool, QueuePool)
+    engine.dispose()
+
+# =========================
+# init_db
+# =========================
+
+def test_init_db_backfills_indexes_on_existing_tables(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'knowmap.db'}")
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE user_graphs (id INTEGER PRIMARY KEY, username VARCHAR, "
+            "source VARCHAR, topic VARCHAR, entities_json TEXT, "
+            "cross_links_json TEXT, graph_json TEXT, created_at VARCHAR)"
+        )
+
+    init_db(engine)
+    init_db(engine)  # idempotent
+
+    indexes = {i["name"] for i in inspect(engine).get_indexes("user_graphs")}
+    assert "ix_user_graphs_username_id" in indexes
+    engine.dispose()
+
+def test_init_db_tolerates_a_concurrent_column_add(tmp_path, monkeypatch):
+    engine = make_engine(f"sqlite:///{tmp_path / 'knowmap.db'}")
+    init_db(engine)
+
+    # Another worker added layout_json after this one inspected the table
+    column_names = database._column_names
+    stale = [True]
+
+    def racing_column_names(engine, table):
+        names = column_names(engine, table)
+        if table.name == "user_graphs" and stale[0]:
+            stale[0] = False
+            names.discard("layout_json")
+        return names
+
+    monkeypatch.setattr(database, "_column_names", racing_column_names)
+    init_db(engine)
+
+    assert "layout_json" in column_names(engine, UserGraph.__table__)
+    engine.dispose()
+
+# =========================
+# save_graphs
+# =========================
+
+def test_save_graphs_commits_the_batch(session, make_graph):
+    rows = save_graphs(session, [make_graph(topic="a"), make_graph(topic="b")])
+
+    assert all(row.id is not None for row in rows)
+    assert session.query(UserGraph).count() == 2
+    # Committed, not just flushed
+    session.rollback()
+    assert session.query(UserGraph).count() == 2
@@ -0,0 +1,186 @@
+import csv
+import io
+import json
+import zipfile
+
+import networkx as nx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend import export
+from backend.database import save_graphs
+from backend.export import ExportError
+
+NODES = ["AT&T", "<model>", 'say "hi"', "n3", "n4"]
+EDGES = [
+    ("AT&T", "<model>", "a & b"),
+    ("<model>", 'say "hi"', "uses"),
+    ('say "hi"', "n3", "uses"),
+    ("n3", "n4", "uses"),
+    ("n4", "AT&T", "uses"),
+]
+
+
+def _graph_json():
+    return json.dumps({
+        "nodes": [{"id": n, "sources": ["wikipedia", "arxiv"]} for n in NODES],
+        "edges": [
+            {"source": s, "target": t, "label": label, "sources": ["arxiv"]}
+            for s, t, label in EDGES
+        ],
+    })
+
+
+def _layout_json():
+    return json.dumps({n: [i / 10, 1 - i / 10] for i, n in enumerate(NODES)})
+
+
+@pytest.fixture
+def graphs(session, make_graph, monkeypatch):
+    # Exports open their own sessions; point them at the test database, and
+    # chunk every two rows so the multi-chunk paths run
+    monkeypatch.setattr(export, "SessionLocal", sessionmaker(bind=session.get_bind()))
+    monkeypatch.setattr(export, "EXPORT_CHUNK_ROWS", 2)
+
+    return save_graphs(session, [
+        make_graph(graph_json=_graph_json(), layout_json=_layout_json()),
+        make_graph(topic="second", graph_json=_graph_json()),
+        make_graph(username="bob", topic="not alice's", graph_json=_graph_json()),
+    ])
+
+
+def _collect(chunks):
+    chunks = list(chunks)
+    return chunks, b"".join(chunks)
+
+# =========================
+# SINGLE GRAPH
+# =========================
+
+def test_graphml_round_trips_escaped_names(graphs):
+    chunks, data = _collect(export.export_graph("alice", graphs[0].id, "graphml"))
+    assert len(chunks) > 2
+
+    graph = nx.parse_graphml(data.decode("utf-8"))
+
+    assert set(graph.nodes) == set(NODES)
+    assert graph.nodes["AT&T"]["sources"] == "wikipedia;arxiv"
+    assert graph.nodes['say "hi"']["x"] == pytest.approx(0.2)
+    assert graph.edges["AT&T", "<model>"]["label"] == "a & b"
+    assert graph.number_of_edges() == len(EDGES)
+
+
+def test_graphml_without_layout_has_no_positions(graphs):
+    _, data = _collect(export.export_graph("alice", graphs[1].id, "graphml"))
+
+    graph = nx.parse_graphml(data.decode("utf-8"))
+
+    assert all("x" not in attrs for _, attrs in graph.nodes(data=True))
+
+
+def test_csv_chunks_end_on_row_boundaries(graphs):
+    chunks, data = _collect(export.export_graph("alice", graphs[0].id, "csv", "edges"))
+
+    assert len(chunks) == 3
+    assert all(chunk.endswith(b"\r\n") for chunk in chunks)
+
+    rows = list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+    assert [(r["source"], r["target"], r["label"]) for r in rows] == EDGES
+    assert rows[0]["sources"] == "arxiv"
+
+
+def test_csv_nodes_include_layout(graphs):
+    _, data = _collect(export.export_graph("alice", graphs[0].id, "csv", "nodes"))
+
+    rows = list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+
+    assert [r["id"] for r in rows] == NODES
+    assert rows[0]["sources"] == "wikipedia;arxiv"
+    assert float(rows[1]["x"]) == pytest.approx(0.1)
+
+
+def test_parquet_writes_one_row_group_per_chunk(graphs):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    _, data = _collect(export.export_graph("alice", graphs[0].id, "parquet", "nodes"))
+    parquet = pq.ParquetFile(io.BytesIO(data))
+
+    assert parquet.num_row_groups == 3
+    rows = parquet.read().to_pylist()
+    assert [r["id"] for r in rows] == NODES
+    assert rows[0]["sources"] == ["wikipedia", "arxiv"]
+    assert rows[0]["x"] == pytest.approx(0.0)
+
+
+def test_arrow_stream_writes_one_batch_per_chunk(graphs):
+    pa = pytest.importorskip("pyarrow")
+
+    _, data = _collect(export.export_graph("alice", graphs[0].id, "arrow", "edges"))
+    batches = list(pa.ipc.open_stream(data))
+
+    assert [b.num_rows for b in batches] == [2, 2, 1]
+    table = pa.Table.from_batches(batches)
+    assert table.column("label").to_pylist() == [label for _, _, label in EDGES]
+
+
+def test_other_users_graphs_are_not_exported(graphs):
+    _, data = _collect(export.export_graph("alice", graphs[2].id, "csv"))
+
+    assert data.decode("utf-8").strip() == ",".join(export.COLUMNS["edges"])
+
+# =========================
+# ARCHIVES
+# =========================
+
+def test_chunk_sink_is_not_seekable():
+    sink = export._ChunkSink()
+    sink.write(b"abc")
+
+    assert not sink.seekable()
+    assert sink.tell() == 3
+    assert sink.drain() == b"abc"
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_archive_streams_a_valid_zip(graphs, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+
+    chunks, data = _collect(export.export_archive("alice", fmt))
+    assert len(chunks) > 1
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == sorted(
+            ["graphs.csv", f"edges.{fmt}", f"nodes.{fmt}"]
+        )
+        listed = list(csv.DictReader(io.StringIO(archive.read("graphs.csv").decode("utf-8"))))
+
+    assert [int(r["graph_id"]) for r in listed] == [graphs[0].id, graphs[1].id]
+
+
+def test_graphml_archive_has_a_file_per_graph(graphs):
+    _, data = _collect(export.export_archive("alice", "graphml"))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        names = [n for n in archive.namelist() if n.endswith(".graphml")]
+        assert names == [f"graphs/graph_{g.id}.graphml" for g in graphs[:2]]
+        graph = nx.parse_graphml(archive.read(names[0]).decode("utf-8"))
+
+    assert set(graph.nodes) == set(NODES)
+
+# =========================
+# VALIDATION
+# =========================
+
+@pytest.mark.parametrize("fmt, table", [("xlsx", "edges"), ("csv", "graphs")])
+def test_validate_rejects_unknown_formats_and_tables(fmt, table):
+    with pytest.raises(ExportError):
+        export.validate(fmt, table)
+
+
+def test_filenames():
+    assert export.filename("csv") == "knowmap_csv.zip"
+    assert export.filename("graphml", 7) == "graph_7.graphml"
+    assert export.filename("arrow", 7, "nodes") == "graph_7_nodes.arrows"
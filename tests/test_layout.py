@@ -0,0 +1,36 @@
+from backend.nlp import layout
+from backend.nlp.layout import compute_layout, layout_is_current
+
+
+def _chain(n):
+    return {
+        "nodes": [{"id": f"n{i}"} for i in range(n)],
+        "edges": [{"source": f"n{i}", "target": f"n{i + 1}", "label": "r"}
+                  for i in range(n - 1)],
+    }
+
+
+def test_layout_covers_every_node_in_the_unit_square():
+    graph = _chain(30)
+    positions = compute_layout(graph)
+
+    assert layout_is_current(graph, positions)
+    assert all(0 <= x <= 1 and 0 <= y <= 1 for x, y in positions.values())
+    assert compute_layout(graph) == positions
+
+
+def test_previous_positions_are_kept_when_nothing_changed():
+    graph = _chain(10)
+    positions = compute_layout(graph)
+
+    assert compute_layout(graph, previous=positions) == positions
+
+
+def test_large_graphs_get_fewer_iterations(monkeypatch):
+    monkeypatch.setattr(layout, "LAYOUT_MAX_PAIRS", 100 * 100 * 10)
+
+    assert layout._iteration_budget(100, 50) == 10
+    assert layout._iteration_budget(10, 50) == 50
+    assert layout._iteration_budget(1000, 50) == layout.LAYOUT_MIN_ITERATIONS
+    # Never more than was asked for
+    assert layout._iteration_budget(1000, 3) == 3
@@ -0,0 +1,195 @@
+import pytest
+import requests
+
+from backend import sources
+from backend.nlp.graph_builder import build_graph, graph_to_json
+from backend.sources import deduplicate, fan_out, fetch_arxiv, fetch_wikipedia
+from benchmarks.stub_upstream import start_stub_server, stub_urls
+
+# The stub serves 20 abstracts from benchmarks/corpora/arxiv_abstracts.jsonl
+STUB_ABSTRACTS = 20
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = start_stub_server(port=0)
+    yield stub_urls(server)
+    server.shutdown()
+
+
+@pytest.fixture
+def upstream(stub, monkeypatch):
+    monkeypatch.setattr(sources, "WIKIPEDIA_API_URL", stub["KNOWMAP_WIKIPEDIA_URL"])
+    monkeypatch.setattr(sources, "ARXIV_API_URL", stub["KNOWMAP_ARXIV_URL"])
+    return stub
+
+
+@pytest.fixture
+def arxiv_requests(monkeypatch):
+    # Records each arXiv page request while still hitting the stub
+    calls = []
+    get = requests.get
+
+    def recording_get(url, **kwargs):
+        calls.append(url)
+        return get(url, **kwargs)
+
+    monkeypatch.setattr(sources.requests, "get", recording_get)
+    return calls
+
+# =========================
+# FETCHING
+# =========================
+
+def test_fetch_wikipedia(upstream):
+    documents = fetch_wikipedia("Graph theory")
+
+    assert len(documents) == 1
+    assert documents[0]
+
+
+def test_fetch_arxiv_pages_up_to_max_results(upstream, arxiv_requests):
+    summaries = fetch_arxiv("graphs", max_results=7, page_size=3)
+
+    assert len(summaries) == 7
+    assert len(arxiv_requests) == 3
+    assert "start=0&max_results=3" in arxiv_requests[0]
+    assert "start=3&max_results=3" in arxiv_requests[1]
+    assert "start=6&max_results=1" in arxiv_requests[2]
+
+
+def test_fetch_arxiv_stops_at_total_results(upstream, arxiv_requests):
+    summaries = fetch_arxiv("graphs", max_results=50, page_size=10)
+
+    assert len(summaries) == STUB_ABSTRACTS
+    # The second page ends exactly at totalResults, so no third request
+    assert len(arxiv_requests) == 2
+
+
+def test_fetch_arxiv_stops_on_short_page(upstream, arxiv_requests):
+    summaries = fetch_arxiv("graphs", max_results=50, page_size=25)
+
+    assert len(summaries) == STUB_ABSTRACTS
+    assert len(arxiv_requests) == 1
+
+# =========================
+# FAN-OUT
+# =========================
+
+def test_deduplicate_drops_repeated_sentences_across_sources():
+    documents = [
+        ("Graphs model networks. Nodes have edges.", "wikipedia"),
+        ("Nodes  have EDGES. Layouts place nodes.", "arxiv"),
+        ("Graphs model networks.", "kaggle"),
+    ]
+
+    assert list(deduplicate(documents)) == [
+        ("Graphs model networks. Nodes have edges.", "wikipedia"),
+        ("Layouts place nodes.", "arxiv"),
+    ]
+
+
+def test_deduplicate_shares_seen_between_calls():
+    seen = set()
+    list(deduplicate([("Graphs model networks.", "wikipedia")], seen))
+
+    assert list(deduplicate([("Graphs model networks.", "arxiv")], seen)) == []
+
+
+def test_fan_out_tags_documents_and_counts_them(upstream):
+    status = {}
+    documents = list(fan_out(
+        "graphs", sources=["wikipedia", "arxiv"], arxiv_max_results=5, status=status
+    ))
+
+    assert status == {"wikipedia": {"documents": 1}, "arxiv": {"documents": 5}}
+    assert sorted(source for _, source in documents) == ["arxiv"] * 5 + ["wikipedia"]
+
+
+def test_fan_out_records_http_errors(upstream, monkeypatch):
+    # Unknown stub paths return 404
+    monkeypatch.setattr(sources, "WIKIPEDIA_API_URL", upstream["KNOWMAP_WIKIPEDIA_URL"] + "/missing")
+    status = {}
+
+    documents = list(fan_out("graphs", sources=["wikipedia", "kaggle"], status=status))
+
+    assert status["wikipedia"] == {"documents": 0, "error": "Wikipedia page not found"}
+    assert status["kaggle"] == {"documents": 1}
+    assert [source for _, source in documents] == ["kaggle"]
+
+
+def test_fan_out_records_unparseable_replies(upstream, monkeypatch):
+    # The Wikipedia route answers 200 with JSON, which is not Atom XML
+    monkeypatch.setattr(sources, "ARXIV_API_URL", upstream["KNOWMAP_WIKIPEDIA_URL"] + "/page/summary")
+    status = {}
+
+    assert list(fan_out("graphs", sources=["arxiv"], status=status)) == []
+    assert status["arxiv"] == {"documents": 0, "error": "arxiv fetch failed"}
+
+
+def test_fan_out_records_connection_errors(monkeypatch):
+    monkeypatch.setattr(sources, "ARXIV_API_URL", "http://127.0.0.1:9/api")
+    status = {}
+
+    assert list(fan_out("graphs", sources=["arxiv"], status=status)) == []
+    assert status["arxiv"] == {"documents": 0, "error": "arxiv fetch failed"}
+
+# =========================
+# PROVENANCE
+# =========================
+
+def _by_id(graph_json):
+    nodes = {node["id"]: node for node in graph_json["nodes"]}
+    edges = {(edge["source"], edge["target"]): edge for edge in graph_json["edges"]}
+    return nodes, edges
+
+
+def test_build_graph_merges_sources():
+    triples = [
+        {"subject": "AI", "relation": "help", "object": "hospital", "source": "wikipedia"},
+        {"subject": "AI", "relation": "help", "object": "hospital", "source": "arxiv"},
+        {"subject": "AI", "relation": "use", "object": "data", "source": "arxiv"},
+    ]
+
+    nodes, edges = _by_id(graph_to_json(build_graph(triples)))
+
+    assert nodes["AI"]["sources"] == ["wikipedia", "arxiv"]
+    assert nodes["data"]["sources"] == ["arxiv"]
+    assert edges[("AI", "hospital")]["sources"] == ["wikipedia", "arxiv"]
+    assert edges[("AI", "data")]["sources"] == ["arxiv"]
+
+
+def test_build_graph_without_sources():
+    triples = [{"subject": "AI", "relation": "help", "object": "hospital"}]
+
+    nodes, edges = _by_id(graph_to_json(build_graph(triples)))
+
+    assert "sources" not in nodes["AI"]
+    assert "sources" not in edges[("AI", "hospital")]
+
+
+def test_analyze_corpus_keeps_provenance(parsed):
+    try:
+        from backend.nlp.pipeline import analyze_corpus
+    except OSError:
+        pytest.skip("spaCy model en_core_web_sm is not installed")
+
+    ai = ("AI/PROPN/nsubj/AI helps/VERB/ROOT/help hospitals/NOUN/dobj/hospital "
+          "./PUNCT/punct/.")
+    doctors = ("Doctors/NOUN/nsubj/doctor use/VERB/ROOT/use data/NOUN/dobj/datum "
+               "./PUNCT/punct/.")
+    docs = [
+        (parsed(ai, [1, 1, 1, 1]), "wikipedia"),
+        (parsed(ai, [1, 1, 1, 1]), "arxiv"),
+        (parsed(doctors, [1, 1, 1, 1]), "arxiv"),
+    ]
+
+    result = analyze_corpus(docs, canonicalize=False)
+    nodes, edges = _by_id(result["graph"])
+
+    assert result["documents"] == 3
+    assert [t["source"] for t in result["triples"]] == ["wikipedia", "arxiv", "arxiv"]
+    assert nodes["AI"]["sources"] == ["wikipedia", "arxiv"]
+    assert nodes["Doctors"]["sources"] == ["arxiv"]
+    assert edges[("AI", "hospitals")]["sources"] == ["wikipedia", "arxiv"]
+    assert set(result["layout"]) == set(nodes)
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from backend import vector_index
+from backend.database import save_graphs
+from backend.vector_index import encode, index_for, index_graphs, related_graphs, terms
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_DIR", tmp_path)
+    vector_index._indexes.clear()
+    yield
+    vector_index._indexes.clear()
+
+
+def _nodes(*ids):
+    return json.dumps({"nodes": [{"id": n} for n in ids], "edges": []})
+
+
+def test_open_indexes_are_bounded(monkeypatch):
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_CACHE_SIZE", 2)
+
+    alice = index_for("alice")
+    index_for("bob")
+    assert index_for("alice") is alice  # now most recently used
+    index_for("carol")
+
+    assert list(vector_index._indexes) == ["alice", "carol"]
+    # An evicted user's index is reopened from disk
+    assert "bob" not in vector_index._indexes
+    assert index_for("bob") is not None
+
+
+def test_related_graphs_uses_the_given_vector(session, monkeypatch, make_graph):
+    rows = save_graphs(session, [
+        make_graph(topic="Hospitals", graph_json=_nodes("hospital", "patient", "doctor")),
+        make_graph(topic="Rockets", graph_json=_nodes("rocket", "orbit", "fuel")),
+    ])
+    index_graphs(rows)
+
+    words = terms(["hospital patient care"])
+    vector = encode(words)
+
+    def no_encode(words):
+        raise AssertionError("words were encoded again")
+
+    monkeypatch.setattr(vector_index, "encode", no_encode)
+    results = related_graphs(session, "alice", words, vector)
+
+    assert [r["topic"] for r in results] == ["Hospitals"]
+    assert results[0]["shared_entities"] == ["hospital", "patient"]
+
+
+def test_related_graphs_without_a_vector(session):
+    assert related_graphs(session, "alice", set(), None) == []
+
+
+def test_rebuild_keeps_cached_indexes_usable(session, make_graph):
+    rows = save_graphs(session, [
+        make_graph(topic="Hospitals", graph_json=_nodes("hospital", "patient", "doctor")),
+        make_graph(topic="Rockets", graph_json=_nodes("rocket", "orbit", "fuel")),
+    ])
+    index_graphs(rows)
+    cached = index_for("alice")
+
+    vector_index.rebuild(session, "alice")
+
+    # A worker's cached index still appends after the rebuild, e.g. a
+    # graph the rebuild already picked up
+    cached.add([rows[0].id], [encode(vector_index.row_terms(rows[0]))])
+    assert len(cached) == 3
+
+    words = terms(["hospital patient"])
+    results = related_graphs(session, "alice", words, encode(words))
+    assert [r["topic"] for r in results] == ["Hospitals"]
+    assert not list(vector_index.VECTOR_INDEX_DIR.glob("*.rebuild"))
@@ -2,6 +2,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import joblib
 
+from export_model import export_compact_model
+
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
@@ -117,3 +119,6 @@ else:
 
 joblib.dump(best_model, "cardio_model.pkl")
 print("Best model saved as cardio_model.pkl")
+
+export_compact_model(best_model, "cardio_model_compact")
+print("Compact model exported to cardio_model_compact/")
@@ -1,6 +1,8 @@
 import pandas as pd
 import joblib
 
+from export_model import export_compact_model
+
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, roc_auc_score
@@ -50,4 +52,8 @@ print(classification_report(y_test, y_pred))
 
 # Save tuned model
 joblib.dump(best_model, "cardio_model_tuned.pkl")
-print("Tuned model saved!")
\ No newline at end of file
+print("Tuned model saved!")
+
+# Fast-loading export for inference services
+export_compact_model(best_model, "cardio_model_tuned_compact")
+print("Compact tuned model exported!")
\ No newline at end of file